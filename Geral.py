@@ -1,42 +1,18 @@
 import streamlit as st
-import pandas as pd
 import plotly.express as px
-from streamlit_app import load_data, filter_data
-
-# Estilo personalizado
-st.markdown("""
-<style>
-    .main-header {
-        font-size: 3rem;
-        font-weight: bold;
-        color: #2E86AB;
-        text-align: center;
-        margin-bottom: 2rem;
-    }
-    .metric-card {
-        background: linear-gradient(135deg, #2E86AB 0%, #764ba2 100%);
-        padding: 1rem;
-        border-radius: 10px;
-        color: white;
-        text-align: center;
-        margin: 0.5rem;
-    }
-    .insight-box {
-        background: linear-gradient(135deg, #1a3293 0%, #2E86AB 100%);
-        padding: 1.5rem;
-        border-radius: 15px;
-        color: white;
-        margin: 1rem 0;
-        box-shadow: 0 4px 15px rgba(0, 0, 0, 0.1);
-    }
-</style>
-""", unsafe_allow_html=True)
+from livraria.cube import by_genre, by_month, totals
+from livraria.histogram import histogram_bars, histogram_frame
+from livraria.fragments import chart, fragment
+from livraria.data import (
+    SALES_COLUMNS, cube_is_exact, data_version, filter_cube, load_cube, sales_bounds, sample_version,
+)
+from livraria.ui import data_viewer, export_panel, plotly_chart, refine_when_exact, sidebar_filters
 
 # Título principal
 st.markdown('<h1 class="main-header">📊 Dashboard de Vendas - Análise de Mercado</h1>', unsafe_allow_html=True)
 
 
-def plot_bar_chart(data, x_col, y_col, title, x_label, y_label):
+def plot_bar_chart(data, x_col, y_col, title, x_label, y_label, error=None):
     fig = px.bar(
         x=data[x_col],
         y=data[y_col],
@@ -45,6 +21,7 @@ def plot_bar_chart(data, x_col, y_col, title, x_label, y_label):
         labels={'x': x_label, 'y': y_label},
         orientation='h',
         color=data[x_col],
+        error_x=error,
     )
 
     fig.update_layout(
@@ -53,26 +30,210 @@ def plot_bar_chart(data, x_col, y_col, title, x_label, y_label):
         coloraxis_showscale=False  
     )
 
+    return fig
 
-    st.plotly_chart(fig, use_container_width=True)
 
+# Projeção de colunas: esta página só usa estas colunas do mart de vendas
+COLUMNS = SALES_COLUMNS
+
+
+def error_bars(filters, by, column, index):
+    # Meia-largura do IC 95% alinhada às barras; None quando os valores são exatos
+    bounds = sales_bounds(filters, by=by, columns=COLUMNS)
+    return None if bounds is None else bounds[column].reindex(index).fillna(0).to_numpy()
+
+
+# Fragmentos da página: cada bloco declara de quais filtros depende e é
+# recalculado só quando eles (ou a versão do dataset) mudam
+@fragment(depends_on=())
+def sales_kpis(filters):
+    return totals(load_cube(columns=COLUMNS))
+
+@fragment()
+def filtered_sales(filters):
+    return int(round(filter_cube(filters, columns=COLUMNS)["count"].sum()))
+
+@chart()
+def price_by_genre_chart(filters):
+    # Gráfico de preço médio por gênero (Plotly)
+    genre_summary = by_genre(filter_cube(filters, columns=COLUMNS))
+    avg_price_genre = genre_summary["avg_price"].sort_values(ascending=True)
+    
+    fig_price = px.bar(
+        x=avg_price_genre.values,
+        y=avg_price_genre.index,
+        title="Preço Médio por Gênero",
+        text= avg_price_genre.values.round(2),
+        labels={'x': 'Preço Médio (R$)', 'y': 'Gênero'},
+        color=avg_price_genre.values,
+        orientation='h',
+        error_x=error_bars(filters, "genre_desc", "avg_price_ci", avg_price_genre.index),
+    )
+
+    fig_price.update_layout(
+        title_font_size=22,
+        title_x=0.3,
+        coloraxis_showscale=False  
+    )
+
+    return fig_price
+
+@chart()
+def sales_by_genre_chart(filters):
+    # Gráfico de vendas por gênero (Plotly)
+    genre_summary = by_genre(filter_cube(filters, columns=COLUMNS))
+    sales_count = genre_summary["count"].sort_values(ascending=True)
+    
+    fig_sales = px.bar(
+        x=sales_count.values,
+        y=sales_count.index,
+        title="Número de Vendas por Gênero",
+        text= sales_count.values.round(0).astype(int),
+        labels={'x': 'Número de Vendas', 'y': 'Gênero'},
+        color=sales_count.values,
+        orientation='h',
+        error_x=error_bars(filters, "genre_desc", "count_ci", sales_count.index),
+    )
+    fig_sales.update_layout(
+        title_font_size=22,
+        title_x=0.3,
+        coloraxis_showscale=False  
+    )
+
+    return fig_sales
+
+@chart()
+def monthly_sales_chart(filters):
+    # Vendas por mês
+    sales_per_month = by_month(filter_cube(filters, columns=COLUMNS))["revenue"]
+
+    # Cria os textos somente para os 3 maiores valores
+    top_3_months = sales_per_month.nlargest(3)
+    bottom_3_months = sales_per_month.nsmallest(3)
+
+    text_labels = [int(val) if month in top_3_months.index or month in bottom_3_months.index else None for month, val in sales_per_month.items()]
+
+    # Cria o gráfico
+    fig_monthly_sales = px.line(
+        x=sales_per_month.index,
+        y=sales_per_month.values,
+        title="Evolução das Vendas Mensais",
+        labels={'x': 'Mês', 'y': 'Valor Total de Vendas (R$)'},
+        text=text_labels,
+        markers=True,
+        error_y=error_bars(filters, "month", "revenue_ci", range(1, 13)),
+    )
+
+    fig_monthly_sales.update_traces(
+        line=dict(color='#2E86AB', width=3),
+        marker=dict(size=8, color="#060079"),
+        textposition="top center",
+        textfont=dict(size=13)
+    )
+
+    fig_monthly_sales.update_layout(
+        title_font_size=22,
+        title_x=0.3,
+        coloraxis_showscale=False,
+    )
+
+    return fig_monthly_sales
+
+@chart()
+def monthly_discounts_chart(filters):
+    # Descontos por mês
+    discounts_per_month = by_month(filter_cube(filters, columns=COLUMNS))["total_discount"]
+    
+    fig_discounts = px.bar(
+        x=discounts_per_month.index,
+        y=discounts_per_month.values,
+        title="Valor Total de Descontos por Mês",
+        labels={'x': 'Mês', 'y': 'Valor Total de Descontos (R$)'},
+        text=  discounts_per_month.values.round(0).astype(int),
+        color=discounts_per_month.values,
+        color_continuous_scale="reds",
+        
+    )
+    fig_discounts.update_layout(
+        title_font_size=22,
+        title_x=0.3,
+        coloraxis_showscale=False  
+    )
+
+    return fig_discounts
+
+@chart()
+def price_distribution_chart(filters):
+    # Faixas calculadas no servidor a partir do cubo (preço × quantidade)
+    cube_filtered = filter_cube(filters, columns=COLUMNS)
+    price_bins = histogram_frame(cube_filtered["price"], weights=cube_filtered["count"], nbins=10)
+
+    fig_dist = histogram_bars(
+        price_bins,
+        x_label='Preço (R$)',
+        title="Distribuição de Vendas por Preços",
+        color_discrete_sequence=["#1a3293"],
+        text_auto=True
+    )
+
+    fig_dist.update_layout(
+        title_font_size=22,
+        xaxis=dict(
+            tickformat=",",
+        ),
+        yaxis_title="Quantidade de Vendas",
+        margin=dict(t=60, l=40, r=40, b=40),
+        title_x=0.3
+    )
+
+    fig_dist.update_traces(marker_line_width=1, marker_line_color="#ffffff")
+
+    return fig_dist
+
+@chart()
+def top_revenue_chart(filters):
+    # Top 10 gêneros por receita
+    genre_summary = by_genre(filter_cube(filters, columns=COLUMNS))
+    revenue_by_genre = genre_summary["revenue"].rename("price").sort_values(ascending=True).tail(5)
+    
+    return plot_bar_chart(
+        data=revenue_by_genre.reset_index(),
+        x_col="price",
+        y_col="genre_desc",
+        title="Top 5 Gêneros por Receita",
+        x_label="Receita (R$)",
+        y_label="Gênero",
+        error=error_bars(filters, "genre_desc", "revenue_ci", revenue_by_genre.index),
+    )
+
+
+# Modo aproximado: enquanto o cubo exato não fica pronto, os fragmentos vêm
+# da amostra e têm chave própria (não se misturam aos valores exatos)
+exact = cube_is_exact(columns=COLUMNS)
+version = data_version() if exact else ("amostra", sample_version())
+if not exact:
+    refine_when_exact(columns=COLUMNS)
 
-df = load_data()
 # Métricas gerais
+kpis = sales_kpis(version)
+bounds = sales_bounds(columns=COLUMNS)
 col1, col2, col3, col4 = st.columns(4)
 with col1:
-    st.metric("📚 Total de Vendas", f"{len(df):,}", border=True)
+    st.metric("📚 Total de Vendas", f"{kpis['sales']:,}", border=True)
 with col2:
-    st.metric("💰 Receita Total", f"R$ {df['price'].sum():,.2f}", border=True)
+    st.metric("💰 Receita Total", f"R$ {kpis['revenue']:,.2f}", border=True,
+              help=None if bounds is None else f"Estimativa: ± R$ {bounds['revenue_ci'].iloc[0]:,.2f} (IC 95%)")
 with col3:
-    st.metric("📈 Preço Médio por", f"R$ {df['price'].mean():.2f}", border=True)
+    st.metric("📈 Preço Médio por", f"R$ {kpis['avg_price']:.2f}", border=True,
+              help=None if bounds is None else f"Estimativa: ± R$ {bounds['avg_price_ci'].iloc[0]:.2f} (IC 95%)")
 with col4:
-    st.metric("🎯 Gêneros Ativos", len(df['genre_desc'].unique()), border=True)
+    st.metric("🎯 Gêneros Ativos", kpis['genres'], border=True)
 
 
-df_filtered = filter_data()
+# Os gráficos são respondidos pelo cubo pré-agregado, não pelas vendas linha a linha
+filters = sidebar_filters(columns=COLUMNS)
 
-if df_filtered.empty:
+if filtered_sales(version, filters) == 0:
     st.warning("Nenhum dado encontrado com os filtros selecionados. Tente ajustar os filtros.")
 else:
 
@@ -83,52 +244,11 @@ else:
 
     with col1:
         with st.container(border = True):
-
-            # Gráfico de preço médio por gênero (Plotly)
-            avg_price_genre = df_filtered.groupby("genre_desc")["price"].mean().sort_values(ascending=True)
-            
-            fig_price = px.bar(
-                x=avg_price_genre.values,
-                y=avg_price_genre.index,
-                title="Preço Médio por Gênero",
-                text= avg_price_genre.values.round(2),
-                labels={'x': 'Preço Médio (R$)', 'y': 'Gênero'},
-                color=avg_price_genre.values,
-                orientation='h',
-            )
-
-            fig_price.update_layout(
-                title_font_size=22,
-                title_x=0.3,
-                coloraxis_showscale=False  
-            )
-
-
-            st.plotly_chart(fig_price, use_container_width=True)
+            plotly_chart(price_by_genre_chart(version, filters), "Geral.price_by_genre_chart", approximate=not exact)
 
     with col2:
         with st.container(border = True):
-            # Gráfico de vendas por gênero (Plotly)
-            sales_count = df_filtered["genre_desc"].value_counts().sort_values(ascending=True)
-            
-            fig_sales = px.bar(
-                x=sales_count.values,
-                y=sales_count.index,
-                title="Número de Vendas por Gênero",
-                text= sales_count.values,
-                labels={'x': 'Número de Vendas', 'y': 'Gênero'},
-                color=sales_count.values,
-                orientation='h',
-
-            )
-            fig_sales.update_layout(
-                title_font_size=22,
-                title_x=0.3,
-                coloraxis_showscale=False  
-            )
-            
-            st.plotly_chart(fig_sales, use_container_width=True)
-
+            plotly_chart(sales_by_genre_chart(version, filters), "Geral.sales_by_genre_chart", approximate=not exact)
     # Insights sobre gêneros
     st.markdown("""
     <div class="insight-box">
@@ -145,76 +265,15 @@ else:
     # Análise temporal
     st.markdown("## 📅 Análise Temporal de Vendas")
 
-    # Preparar dados temporais
-    df_filtered["sale_date"] = pd.to_datetime(df_filtered["sale_date"])
-    df_filtered["month"] = df_filtered["sale_date"].dt.month_name()
-    df_filtered["total_discount"] = df_filtered["price"] * df_filtered["discount"]
-
-    month_order = ["January", "February", "March", "April", "May", "June", 
-                "July", "August", "September", "October", "November", "December"]
-
     col1, col2 = st.columns(2)
 
     with col1:
         with st.container(border = True):
-            # Vendas por mês
-            sales_per_month = df_filtered.groupby("month")["price"].sum().reindex(month_order).fillna(0)
-
-            # Cria os textos somente para os 3 maiores valores
-            top_3_months = sales_per_month.nlargest(3)
-            bottom_3_months = sales_per_month.nsmallest(3)
-
-            text_labels = [int(val) if month in top_3_months.index or month in bottom_3_months.index else None for month, val in sales_per_month.items()]
-
-            # Cria o gráfico
-            fig_monthly_sales = px.line(
-                x=sales_per_month.index,
-                y=sales_per_month.values,
-                title="Evolução das Vendas Mensais",
-                labels={'x': 'Mês', 'y': 'Valor Total de Vendas (R$)'},
-                text=text_labels,
-                markers=True
-            )
-
-            fig_monthly_sales.update_traces(
-                line=dict(color='#2E86AB', width=3),
-                marker=dict(size=8, color="#060079"),
-                textposition="top center",
-                textfont=dict(size=13)
-            )
-
-            fig_monthly_sales.update_layout(
-                title_font_size=22,
-                title_x=0.3,
-                coloraxis_showscale=False,
-            )
-
-            st.plotly_chart(fig_monthly_sales, use_container_width=True)
+            plotly_chart(monthly_sales_chart(version, filters), "Geral.monthly_sales_chart", approximate=not exact)
 
     with col2:
         with st.container(border = True):
-
-            # Descontos por mês
-            discounts_per_month = df_filtered.groupby("month")["total_discount"].sum().reindex(month_order).fillna(0)
-            
-            fig_discounts = px.bar(
-                x=discounts_per_month.index,
-                y=discounts_per_month.values,
-                title="Valor Total de Descontos por Mês",
-                labels={'x': 'Mês', 'y': 'Valor Total de Descontos (R$)'},
-                text=  discounts_per_month.values.round(0).astype(int),
-                color=discounts_per_month.values,
-                color_continuous_scale="reds",
-                
-            )
-            fig_discounts.update_layout(
-                title_font_size=22,
-                title_x=0.3,
-                coloraxis_showscale=False  
-            )
-            
-
-            st.plotly_chart(fig_discounts, use_container_width=True)
+            plotly_chart(monthly_discounts_chart(version, filters), "Geral.monthly_discounts_chart", approximate=not exact)
 
     # Insight temporal
     st.markdown("""
@@ -236,45 +295,11 @@ else:
 
     with col1:
         with st.container(border = True):
-
-            fig_dist = px.histogram(
-                df_filtered,
-                x="price",
-                nbins=10,
-                title="Distribuição de Vendas por Preços",
-                labels={'price': 'Preço (R$)'},
-                color_discrete_sequence=["#1a3293"],
-                text_auto=True
-            )
-
-            fig_dist.update_layout(
-                title_font_size=22,
-                xaxis=dict(
-                    tickformat=",",
-                ),
-                yaxis_title="Quantidade de Vendas",
-                margin=dict(t=60, l=40, r=40, b=40),
-                title_x=0.3
-            )
-
-            fig_dist.update_traces(marker_line_width=1, marker_line_color="#ffffff")
-
-            st.plotly_chart(fig_dist, use_container_width=True)
+            plotly_chart(price_distribution_chart(version, filters), "Geral.price_distribution_chart", approximate=not exact)
 
     with col2:
         with st.container(border = True):
-
-            # Top 10 gêneros por receita
-            revenue_by_genre = df_filtered.groupby("genre_desc")["price"].sum().sort_values(ascending=True).tail(5)
-            
-            plot_bar_chart(
-                data=revenue_by_genre.reset_index(),
-                x_col="price",
-                y_col="genre_desc",
-                title="Top 5 Gêneros por Receita",
-                x_label="Receita (R$)",
-                y_label="Gênero"
-            )
+            plotly_chart(top_revenue_chart(version, filters), "Geral.top_revenue_chart", approximate=not exact)
     st.markdown("""
             <div class="insight-box">
             <h3>📊 Insights: Preços e Receita por Gênero</h3>
@@ -291,7 +316,8 @@ else:
 
     # Opção para mostrar dados
     with st.expander("📋 Visualizar Dados Filtrados"):
-        st.dataframe(df_filtered, use_container_width=True)
+        data_viewer(filters, columns=COLUMNS, key="vendas")
+        export_panel(filters, columns=COLUMNS, key="vendas")
     st.markdown(
         "<div style='text-align: center; color: #666; padding: 20px;'>"
         "📚 Dashboard de Análise de Vendas - Livraria | Desenvolvido com Streamlit"
@@ -0,0 +1,126 @@
+import pandas as pd
+import plotly.express as px
+import streamlit as st
+from livraria.data import book_lookup
+from livraria.ui import plotly_chart
+
+# Título principal
+st.markdown('<h1 class="main-header">📖 Detalhes por Livro - Autor e Editora</h1>', unsafe_allow_html=True)
+
+
+def monthly_sales_chart(monthly):
+    # Vendas mensais do livro
+    fig = px.line(
+        x=pd.to_datetime(monthly["month"].astype(int).astype(str), format="%Y%m"),
+        y=monthly["sales"],
+        title="Vendas Mensais",
+        labels={'x': 'Mês', 'y': 'Vendas'},
+        markers=True,
+    )
+
+    fig.update_layout(
+        title_font_size=22,
+        title_x=0.3,
+    )
+
+    return fig
+
+def rating_histogram_chart(ratings):
+    # Histograma de estrelas do livro
+    fig = px.bar(
+        x=ratings.values,
+        y=[f"{int(i)} ⭐" for i in ratings.index],
+        title="Distribuição de Avaliações",
+        text=ratings.values,
+        labels={'x': 'Quantidade de Avaliações', 'y': 'Avaliação'},
+        orientation='h',
+        color=ratings.values,
+    )
+
+    fig.update_layout(
+        title_font_size=22,
+        title_x=0.3,
+        coloraxis_showscale=False
+    )
+
+    return fig
+
+def format_sales_chart(editions):
+    # Vendas por formato (somando as edições de cada formato)
+    by_format = editions.groupby("format_desc", observed=True)["sales"].sum().sort_values(ascending=True)
+
+    fig = px.bar(
+        x=by_format.values,
+        y=by_format.index,
+        title="Vendas por Formato",
+        text=by_format.values.round(0).astype(int),
+        labels={'x': 'Vendas', 'y': 'Formato'},
+        orientation='h',
+        color=by_format.values,
+    )
+
+    fig.update_layout(
+        title_font_size=22,
+        title_x=0.3,
+        coloraxis_showscale=False
+    )
+
+    return fig
+
+
+lookup = book_lookup()
+books = lookup.books
+
+# Busca pelo índice de prefixos (título, autor e editora); sem texto, os mais vendidos
+query = st.text_input("🔎 Buscar livro", placeholder="Título, autor ou editora (ex.: \"alan\", \"hopf\")")
+results = lookup.search(query)
+
+if not results:
+    st.warning("Nenhum livro encontrado. Tente outro título, autor ou editora.")
+else:
+    book_id = st.selectbox(
+        f"📚 Livros encontrados ({len(results)})",
+        results,
+        format_func=lambda b: f"{books.loc[b, 'title']} — {books.loc[b, 'author']}",
+    )
+    book = lookup.book(book_id)
+    info, editions, ratings = book["info"], book["editions"], book["ratings"]
+
+    st.markdown(f"## {info['title']}")
+    st.caption(f"{info['author']} · {info['genre_desc']} · {info['publishers']}")
+
+    reviews = int(ratings.sum())
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("🛒 Vendas", f"{int(info['sales']):,}", border=True)
+    with col2:
+        st.metric("💵 Receita Total", f"R$ {info['revenue']:,.2f}", border=True)
+    with col3:
+        st.metric("📝 Avaliações", f"{reviews:,}", border=True)
+    with col4:
+        avg_rating = (ratings * ratings.index).sum() / reviews if reviews else 0.0
+        st.metric("⭐ Avaliação Média", f"{avg_rating:.1f}/5", border=True)
+
+    with st.container(border=True):
+        plotly_chart(monthly_sales_chart(book["monthly"]), "Livros.monthly_sales_chart")
+
+    col1, col2 = st.columns(2)
+
+    with col1:
+        with st.container(border=True):
+            plotly_chart(rating_histogram_chart(ratings), "Livros.rating_histogram_chart")
+
+    with col2:
+        with st.container(border=True):
+            plotly_chart(format_sales_chart(editions), "Livros.format_sales_chart")
+
+    # Edições do livro
+    st.markdown("### 🗂️ Edições")
+    st.dataframe(
+        editions[["isbn", "format_desc", "publisher", "publication_date", "pages", "price", "sales", "revenue"]],
+        hide_index=True,
+        use_container_width=True,
+    )
+
+    # Footer
+    st.markdown("---")
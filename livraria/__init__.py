@@ -0,0 +1 @@
+# Camada de dados do dashboard da livraria
@@ -0,0 +1,183 @@
+import argparse
+import json
+import logging
+import platform
+import resource
+import shutil
+import statistics
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import pandas as pd
+
+from livraria import cube, ratings
+from livraria.dates import DATE_DIM_MART
+from livraria.etl import SALES_MART, build_full
+from livraria.filter_index import FilterIndex
+from livraria.filters import FilterState
+from livraria.histogram import histogram_frame
+from livraria.storage import CACHE_DIR_NAME, compact, read_mart, unique_orders
+from livraria.synthetic import DISTRIBUTIONS, generate
+
+
+# Benchmark do caminho de dados do dashboard: ETL, carga fria/quente dos
+# marts, filtros para estados típicos da sidebar, agregações de cada gráfico
+# e pico de memória. O resultado vai para um JSON comparável entre execuções.
+SALES_COLUMNS = ("genre_desc", "price", "discount", "total_discount", "date_id", "sale_date", "order_id")
+RESULTS_DIR = "benchmark_results"
+
+logger = logging.getLogger(__name__)
+
+
+def peak_rss_mb():
+    # ru_maxrss vem em KB no Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class Benchmark:
+
+    def __init__(self, repeat=5):
+        self.repeat = repeat
+        self.results = []
+
+    def run(self, stage, name, fn, repeat=None, rows=None):
+        timings = []
+        for _ in range(repeat or self.repeat):
+            start = time.perf_counter()
+            value = fn()
+            timings.append(time.perf_counter() - start)
+        self.results.append({
+            "stage": stage,
+            "name": name,
+            "seconds": statistics.median(timings),
+            "min_seconds": min(timings),
+            "repeat": len(timings),
+            "rows": rows if rows is not None else (len(value) if hasattr(value, "__len__") else None),
+            "peak_rss_mb": round(peak_rss_mb(), 1),
+        })
+        logger.info("%-10s %-28s %9.4fs", stage, name, statistics.median(timings))
+        return value
+
+
+def sidebar_states(df):
+    # Estados representativos da sidebar, derivados do próprio mart
+    genres = df["genre_desc"].value_counts().index.tolist()
+    price = df["price"].astype("float64").round(2)
+    lo, hi, mid = float(price.min()), float(price.max()), float(price.median())
+    return {
+        "todos": FilterState(tuple(genres), (lo, hi)),
+        "um_genero": FilterState(tuple(genres[:1]), (lo, hi)),
+        "tres_generos_faixa": FilterState(tuple(genres[:3]), (10.0, 20.0)),
+        "com_desconto": FilterState(tuple(genres), (lo, hi), discount_only=True),
+        "faixa_estreita": FilterState(tuple(genres), (mid - 1.0, mid + 1.0)),
+    }
+
+
+def load_sales(mart_dir):
+    # Mesma carga do dashboard: projeção, tipos compactos e remoção de pedidos duplicados
+    df = read_mart(Path(mart_dir) / SALES_MART, columns=list(SALES_COLUMNS), compact_dtypes=True)
+    return unique_orders(df)
+
+
+def run_benchmarks(data_dir, mart_dir, repeat=5):
+    bench = Benchmark(repeat)
+    mart_dir = Path(mart_dir)
+
+    bench.run("etl", "build_full", lambda: build_full(data_dir, mart_dir), repeat=1)
+
+    # Carga fria: sem o cache colunar, o CSV é lido e convertido para Parquet
+    shutil.rmtree(mart_dir / CACHE_DIR_NAME, ignore_errors=True)
+    bench.run("load", "sales_cold", lambda: load_sales(mart_dir), repeat=1)
+    df = bench.run("load", "sales_warm", lambda: load_sales(mart_dir))
+    hist_path = mart_dir / ratings.RATING_HIST_MART
+    facts = bench.run("load", "ratings_warm", lambda: compact(ratings.read_rating_facts(hist_path)))
+    date_dim = read_mart(mart_dir / DATE_DIM_MART, compact_dtypes=True)
+
+    sales_cube = bench.run("build", "sales_cube", lambda: cube.build_sales_cube(df, date_dim), repeat=1)
+    index = bench.run("build", "filter_index", lambda: FilterIndex(df), repeat=1, rows=len(df))
+
+    for name, filters in sidebar_states(df).items():
+        bench.run("filter", f"index_{name}", lambda: index.positions(filters))
+        bench.run("filter", f"cube_{name}", lambda: cube.slice_cube(sales_cube, filters))
+
+    # Agregações de cada gráfico, para o estado sem filtros
+    bench.run("chart", "geral_kpis", lambda: cube.totals(sales_cube), rows=len(sales_cube))
+    bench.run("chart", "geral_by_genre", lambda: cube.by_genre(sales_cube))
+    bench.run("chart", "geral_by_month", lambda: cube.by_month(sales_cube))
+    bench.run("chart", "geral_price_histogram",
+              lambda: histogram_frame(sales_cube["price"], weights=sales_cube["count"], nbins=10))
+    bench.run("chart", "avaliacoes_kpis", lambda: ratings.totals(facts), rows=len(facts))
+    bench.run("chart", "avaliacoes_by_rating", lambda: ratings.by_rating(facts))
+    bench.run("chart", "avaliacoes_by_genre", lambda: ratings.by_genre(facts))
+    bench.run("chart", "avaliacoes_price_histogram",
+              lambda: histogram_frame(facts["price"], weights=facts["n"], groups=facts["rating"], nbins=10))
+    return bench.results
+
+
+def compare(results, baseline):
+    # Razão entre os tempos da execução atual e de uma execução anterior
+    previous = {(r["stage"], r["name"]): r["seconds"] for r in baseline["results"]}
+    rows = []
+    for r in results["results"]:
+        before = previous.get((r["stage"], r["name"]))
+        rows.append({
+            "stage": r["stage"],
+            "name": r["name"],
+            "baseline_s": before,
+            "current_s": r["seconds"],
+            "ratio": r["seconds"] / before if before else None,
+        })
+    return pd.DataFrame(rows)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark do caminho de dados do dashboard")
+    parser.add_argument("--data-dir", help="CSVs de origem já existentes (se omitido, gera dados sintéticos)")
+    parser.add_argument("--work-dir", default=".bench", help="Diretório para dados gerados e marts")
+    parser.add_argument("--sales", type=int, default=1_000_000, help="Linhas de vendas sintéticas")
+    parser.add_argument("--ratings", type=int, help="Linhas de avaliações sintéticas")
+    parser.add_argument("--distribution", choices=DISTRIBUTIONS, default="empirical")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=5, help="Repetições das medições rápidas (mediana)")
+    parser.add_argument("--output", help=f"Arquivo JSON de resultados (padrão: {RESULTS_DIR}/<data>.json)")
+    parser.add_argument("--compare", metavar="BASELINE_JSON", help="Compara com uma execução anterior")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    work_dir = Path(args.work_dir)
+    mart_dir = work_dir / "marts"
+    mart_dir.mkdir(parents=True, exist_ok=True)
+
+    dataset = {"data_dir": args.data_dir}
+    data_dir = args.data_dir
+    if data_dir is None:
+        data_dir = work_dir / "data"
+        dataset = generate(data_dir, args.sales, args.ratings, distribution=args.distribution, seed=args.seed)
+
+    started = datetime.now(timezone.utc)
+    results = {
+        "meta": {
+            "started_at": started.isoformat(timespec="seconds"),
+            "dataset": dataset,
+            "repeat": args.repeat,
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "platform": platform.platform(),
+        },
+        "results": run_benchmarks(data_dir, mart_dir, repeat=args.repeat),
+    }
+    results["meta"]["peak_rss_mb"] = round(peak_rss_mb(), 1)
+
+    output = Path(args.output or Path(RESULTS_DIR) / f"{started:%Y%m%dT%H%M%SZ}.json")
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(results, indent=2))
+    logger.info("Resultados gravados em %s", output)
+
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text())
+        print(compare(results, baseline).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
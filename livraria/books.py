@@ -0,0 +1,138 @@
+import re
+import unicodedata
+from collections import defaultdict
+
+import pandas as pd
+
+from livraria.dates import date_id
+from livraria.ratings import HIST_COLUMNS, STARS
+
+
+# Marts por livro para a página de detalhes: o catálogo de edições (com autor
+# e editora) vem das dimensões, e as vendas por edição e por livro × mês são
+# somas acumuladas bloco a bloco pelo ETL. Como são aditivas, a carga
+# incremental só soma os blocos novos ao que já estava gravado.
+BOOK_CATALOG_MART = "book_catalog.csv"
+BOOK_SALES_MART = "book_sales.csv"
+BOOK_MONTHLY_MART = "book_sales_monthly.csv"
+BOOK_MARTS = [BOOK_CATALOG_MART, BOOK_SALES_MART, BOOK_MONTHLY_MART]
+
+CATALOG_COLUMNS = [
+    "isbn", "book_id", "title", "author", "genre_desc", "format_desc", "publisher",
+    "publication_date", "pages", "price",
+]
+SALES_SUMS = ["sales", "revenue", "total_discount"]
+
+
+def build_catalog(tables):
+    # Uma linha por edição. A editora vem do par (livro, pub_id): no
+    # publisher.csv o mesmo pub_id aparece com nomes diferentes por livro
+    catalog = pd.merge(tables["book"], tables["edition"], how="inner", on="book_id")
+    catalog = pd.merge(catalog, tables["format"], how="inner", on="format_id")
+    catalog = pd.merge(catalog, tables["info"][["genre_id", "book_id"]], how="inner", on="book_id")
+    catalog = pd.merge(catalog, tables["genders"], how="inner", on="genre_id")
+    catalog = pd.merge(catalog, tables["author"], how="left", on="author_id")
+    publishers = tables["publisher"].drop_duplicates(subset=["book_id", "pub_id"])[["book_id", "pub_id", "name"]]
+    catalog = pd.merge(catalog, publishers, how="left", on=["book_id", "pub_id"])
+
+    catalog["author"] = (catalog["first_name"].fillna("") + " " + catalog["last_name"].fillna("")).str.strip()
+    catalog["publisher"] = catalog["name"].fillna(catalog["pub_id"])
+    catalog["publication_date"] = pd.to_datetime(catalog["publication_date"], format="%d/%m/%Y")
+    return catalog[CATALOG_COLUMNS].sort_values(["book_id", "isbn"]).reset_index(drop=True)
+
+
+def book_sales(book_dimension, sales):
+    # Somas de um bloco de vendas (uma linha por item vendido): por edição e por livro × mês
+    rows = pd.merge(book_dimension[["isbn", "book_id", "price"]], sales[["isbn", "sale_date", "discount"]],
+                    how="inner", on="isbn")
+    rows = rows.assign(
+        sales=1,
+        revenue=rows["price"],
+        total_discount=(rows["price"] * rows["discount"].fillna(0)).round(4),
+        month=date_id(rows["sale_date"]) // 100,
+    )
+    by_edition = rows.groupby("isbn", as_index=False)[SALES_SUMS].sum()
+    monthly = rows.groupby(["book_id", "month"], as_index=False)[["sales", "revenue"]].sum()
+    return by_edition, monthly
+
+
+def add_sales(total, chunk, keys):
+    # Soma dois agregados com as mesmas chaves (ex.: o gravado e o de um bloco novo)
+    if total is None or total.empty:
+        return chunk
+    return pd.concat([total, chunk]).groupby(keys, as_index=False).sum()
+
+
+def normalize(text):
+    # Minúsculas e sem acentos, para "ação" achar "acao" e vice-versa
+    text = unicodedata.normalize("NFKD", str(text).lower())
+    return "".join(c for c in text if not unicodedata.combining(c))
+
+
+def tokenize(text):
+    return re.findall(r"\w+", normalize(text))
+
+
+class BookLookup:
+    # Busca e detalhes de livros, montados uma vez por versão dos marts:
+    # - índice de prefixos: cada prefixo de cada palavra do título, autor e
+    #   editora aponta para os livros que a contêm; uma busca é a interseção
+    #   dos conjuntos das palavras digitadas, sem varrer o catálogo
+    # - agregados por livro (edições, vendas por mês, histograma de estrelas)
+    #   em dicionários, então o detalhe de um livro não depende do volume de
+    #   vendas e avaliações
+
+    def __init__(self, catalog, sales, monthly, hist):
+        editions = pd.merge(catalog, sales, how="left", on="isbn")
+        editions[SALES_SUMS] = editions[SALES_SUMS].fillna(0)
+        hist = hist.set_index("book_id").reindex(columns=HIST_COLUMNS)
+
+        books = editions.groupby("book_id", sort=False).agg(
+            title=("title", "first"),
+            author=("author", "first"),
+            genre_desc=("genre_desc", "first"),
+            publishers=("publisher", lambda p: ", ".join(sorted(set(p)))),
+            sales=("sales", "sum"),
+            revenue=("revenue", "sum"),
+        )
+        # Ordem dos resultados: mais vendidos primeiro, depois o título
+        books = books.sort_values(["sales", "title"], ascending=[False, True], kind="stable")
+        self.books = books
+        self._rank = {book_id: position for position, book_id in enumerate(books.index)}
+
+        prefixes = defaultdict(set)
+        for book_id, book in books.iterrows():
+            for token in tokenize(f"{book['title']} {book['author']} {book['publishers']}"):
+                for end in range(1, len(token) + 1):
+                    prefixes[token[:end]].add(book_id)
+        self._prefixes = {prefix: frozenset(ids) for prefix, ids in prefixes.items()}
+
+        self._editions = {book_id: frame.reset_index(drop=True) for book_id, frame in editions.groupby("book_id")}
+        self._monthly = {book_id: frame.reset_index(drop=True) for book_id, frame in monthly.groupby("book_id")}
+        self._hist = {
+            book_id: pd.Series(row.to_numpy(), index=STARS, name="reviews")
+            for book_id, row in hist.fillna(0).astype("int64").iterrows()
+        }
+
+    def search(self, query, limit=20):
+        tokens = tokenize(query)
+        if not tokens:
+            return self.books.index[:limit].tolist()
+        matches = None
+        for token in tokens:
+            ids = self._prefixes.get(token, frozenset())
+            matches = ids if matches is None else matches & ids
+            if not matches:
+                return []
+        return sorted(matches, key=self._rank.__getitem__)[:limit]
+
+    def book(self, book_id):
+        monthly = self._monthly.get(book_id)
+        if monthly is None:
+            monthly = pd.DataFrame({"book_id": [], "month": [], "sales": [], "revenue": []})
+        return {
+            "info": self.books.loc[book_id],
+            "editions": self._editions[book_id],
+            "monthly": monthly,
+            "ratings": self._hist.get(book_id, pd.Series(0, index=STARS, name="reviews")),
+        }
@@ -0,0 +1,68 @@
+import pandas as pd
+
+from livraria.dates import lookup
+
+
+# Cubo de vendas pré-agregado: gênero × mês × preço × com desconto.
+# O preço é o da edição (arredondado ao centavo), então há poucas faixas
+# distintas e o filtro de preço continua exato.
+CUBE_DIMENSIONS = ["genre_desc", "month", "price", "discounted"]
+
+MONTH_ORDER = ["January", "February", "March", "April", "May", "June",
+               "July", "August", "September", "October", "November", "December"]
+
+
+def build_sales_cube(df, date_dim):
+    # date_id e total_discount já vêm materializados do ETL; o mês sai da
+    # dimensão de datas por chave inteira, sem manipular datetime aqui.
+    # Valores arredondados ao centavo (e em float64) antes de somar
+    price = df["price"].astype("float64").round(2)
+    facts = pd.DataFrame({
+        "genre_desc": df["genre_desc"],
+        "month": lookup(date_dim, df["date_id"], "month"),
+        "price": price,
+        "discounted": df["discount"].fillna(0) > 0,
+        "total_discount": df["total_discount"].astype("float64").round(4),
+    })
+    return facts.groupby(CUBE_DIMENSIONS, observed=True).agg(
+        count=("price", "size"),
+        revenue=("price", "sum"),
+        total_discount=("total_discount", "sum"),
+    ).reset_index()
+
+
+def slice_cube(cube, filters):
+    cube_filtered = cube[
+        (cube["genre_desc"].isin(filters.genres)) &
+        (cube["price"] >= filters.price_range[0]) &
+        (cube["price"] <= filters.price_range[1])
+    ]
+    if filters.discount_only:
+        cube_filtered = cube_filtered[cube_filtered["discounted"]]
+    return cube_filtered
+
+
+def totals(cube):
+    # round: no cubo da amostra as contagens são somas de pesos
+    sales = int(round(cube["count"].sum()))
+    revenue = cube["revenue"].sum()
+    return {
+        "sales": sales,
+        "revenue": revenue,
+        "avg_price": revenue / sales if sales else 0.0,
+        "genres": cube["genre_desc"].nunique(),
+    }
+
+
+def by_genre(cube):
+    genre = cube.groupby("genre_desc", observed=True)[["count", "revenue"]].sum()
+    genre["avg_price"] = genre["revenue"] / genre["count"]
+    return genre
+
+
+def by_month(cube):
+    month = cube.groupby("month")[["revenue", "total_discount"]].sum()
+    month = month.reindex(range(1, 13), fill_value=0)
+    month.index = MONTH_ORDER
+    return month
+
@@ -0,0 +1,481 @@
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+from livraria import metrics
+from livraria.cube import build_sales_cube, slice_cube
+from livraria.dates import DATE_DIM_MART
+from livraria.filter_cache import FilterCache, filter_key
+from livraria.filter_index import FilterIndex
+from livraria.filters import FilterState
+from livraria.memo import memo
+from livraria.ratings import RATING_HIST_MART, rating_facts_version, read_rating_facts
+from livraria.storage import compact, dataset_version, mart_columns, read_mart, read_shared, unique_orders
+
+
+# Camada de dados do dashboard (carga dos marts, filtros e agregações), usada
+# pelas páginas e pelos componentes de livraria.ui. Fica fora do script
+# principal para que as páginas a importem sem reexecutar o app. Módulos de
+# um backend ou recurso específico (SQLite, snapshots, modo aproximado,
+# página de livros, exportação, registro de uso) são importados sob demanda,
+# dentro das funções que os usam.
+
+# Backend dos dados: "pandas" (marts em memória) ou "sqlite" (consultas no
+# banco gerado por `python -m livraria.etl --sqlite livraria.sqlite`)
+BACKEND = os.environ.get("LIVRARIA_BACKEND", "pandas")
+DATABASE = os.environ.get("LIVRARIA_DATABASE", "livraria.sqlite")
+# Linhas por página na tabela de dados filtrados
+VIEWER_PAGE_ROWS = 100
+
+# Marts compartilhados entre processos: Arrow IPC mapeado em memória (somente leitura)
+SHARED_MARTS = os.environ.get("LIVRARIA_SHARED_MARTS") == "1"
+
+# Modo aproximado: enquanto o cubo exato de vendas é montado em segundo plano,
+# o Geral.py é respondido pela amostra estratificada gravada pelo ETL
+APPROXIMATE = os.environ.get("LIVRARIA_APPROXIMATE") == "1"
+
+# Snapshots versionados (`python -m livraria.etl --snapshot-root DIR`): os
+# marts são lidos do snapshot publicado, e um snapshot novo é preparado em
+# segundo plano e trocado sem reiniciar o app (só no backend pandas)
+SNAPSHOT_ROOT = os.environ.get("LIVRARIA_SNAPSHOTS")
+SNAPSHOT_POLL = float(os.environ.get("LIVRARIA_SNAPSHOT_POLL", 5))
+# Tempo sem nenhuma sessão fixada até um snapshot antigo ser liberado
+SNAPSHOT_GRACE = float(os.environ.get("LIVRARIA_SNAPSHOT_GRACE", 600))
+
+# Aquecimento dos caches em segundo plano quando o processo começa a servir
+# e depois de cada atualização dos dados: estado inicial da sidebar e os
+# LIVRARIA_WARMUP_STATES estados mais pedidos de cada página
+WARMUP = os.environ.get("LIVRARIA_WARMUP", "1") == "1"
+WARMUP_STATES = int(os.environ.get("LIVRARIA_WARMUP_STATES", 5))
+WARMUP_THREAD = "livraria-warmup"
+
+# Projeção de colunas do mart de vendas usada pelo Geral.py
+SALES_COLUMNS = ("genre_desc", "price", "discount", "total_discount", "date_id", "sale_date", "order_id")
+
+logger = logging.getLogger(__name__)
+
+
+@st.cache_resource
+def get_database():
+    # Importado só no modo SQLite
+    from livraria.sql_backend import SqliteBackend
+
+    return SqliteBackend(DATABASE)
+
+@st.cache_data(max_entries=64)
+def _sql_query(version, method, *args):
+    # Resultados do banco já são agregados (ou uma página de linhas): baratos de cachear
+    return getattr(get_database(), method)(*args)
+
+def sql_query(method, *args):
+    return _sql_query(get_database().version, method, *args)
+
+
+def snapshots_enabled():
+    return SNAPSHOT_ROOT is not None and BACKEND != "sqlite"
+
+@st.cache_resource
+def get_snapshot_watcher():
+    from livraria.snapshots import SnapshotWatcher
+
+    return SnapshotWatcher(
+        SNAPSHOT_ROOT, warm_caches, release_snapshot, interval=SNAPSHOT_POLL, grace=SNAPSHOT_GRACE,
+    ).start()
+
+def pin_snapshot():
+    # Chamado no início de cada execução completa do app: a execução (e os
+    # fragmentos que ela desenhar) usa este snapshot até o fim, mesmo que um
+    # novo seja ativado no meio do caminho
+    if not snapshots_enabled():
+        return None
+    ctx = get_script_run_ctx()
+    snapshot = get_snapshot_watcher().pin(ctx.session_id if ctx is not None else None)
+    st.session_state["_livraria_snapshot"] = snapshot
+    return snapshot
+
+def active_snapshot():
+    snapshot = st.session_state.get("_livraria_snapshot")
+    if snapshot is None or not snapshot.exists():
+        # Sessão sem snapshot fixado, ou o dela já foi removido pelo ETL
+        snapshot = pin_snapshot()
+    return snapshot
+
+def resolve(file_path):
+    # Nomes de mart sem diretório apontam para o snapshot da sessão; caminhos
+    # completos (como os do aquecimento) passam direto
+    if not snapshots_enabled() or Path(file_path).parent != Path("."):
+        return file_path
+    snapshot = active_snapshot()
+    return file_path if snapshot is None else snapshot / file_path
+
+def release_snapshot(snapshot):
+    # Tudo o que foi montado a partir do snapshot antigo sai dos caches do
+    # processo assim que ele deixa de ser usado: posições filtradas, marts,
+    # dimensão de datas, cubos, índices, opções dos filtros, amostra e a busca
+    # de livros. Só as figuras prontas (pequenas, no st.cache_data dos
+    # fragmentos) ficam até serem descartadas pelo max_entries
+    get_filter_cache().discard(str(snapshot / name) for name in ["df.csv", RATING_HIST_MART])
+
+    def from_snapshot(file_path, *args):
+        return Path(file_path).is_relative_to(snapshot)
+
+    for cache in [
+        _load_private_mart, _load_shared_mart, _load_date_dimension, _load_cube, _load_sample_facts,
+        _load_sample_cube, _exact_cube_job, _load_filter_index, _filter_options, _sample_options,
+        _load_book_lookup,
+    ]:
+        cache.discard(from_snapshot)
+
+
+# Carregar os dados (via cache colunar, reconstruído quando o CSV muda).
+# A versão do dataset entra na chave dos caches: um CSV novo invalida tudo.
+# `columns` é a projeção de colunas de cada página e os tipos são sempre
+# compactos (categorias, float32 fora dos valores em reais, inteiros pequenos).
+# Marts, cubo, índices e opções ficam em caches do processo (livraria.memo),
+# fora dos caches do Streamlit: as sessões e o aquecimento em segundo plano
+# usam as mesmas entradas, e os frames são somente leitura para as páginas.
+def _read_compact_mart(file_path, columns=None):
+    if Path(file_path).name == RATING_HIST_MART:
+        # Avaliações: fatos por edição × estrela, ponderados pela coluna n
+        data = compact(read_rating_facts(file_path))
+        return data if columns is None else data[list(columns)]
+
+    # order_id é sempre lido quando existe, para a remoção de duplicados
+    read_columns = columns
+    if columns is not None and "order_id" in mart_columns(file_path):
+        read_columns = list(dict.fromkeys([*columns, "order_id"]))
+    data = read_mart(file_path, columns=read_columns, compact_dtypes=True)
+    if "order_id" in data.columns:
+        data = unique_orders(data)
+    return data if columns is None else data[list(columns)]
+
+@memo(max_entries=4)
+def _load_private_mart(file_path, version, columns=None):
+    return _read_compact_mart(file_path, columns)
+
+@memo(max_entries=4)
+def _load_shared_mart(file_path, version, columns=None):
+    # O frame aponta para o mapa compartilhado com os outros processos
+    return read_shared(file_path, version, lambda: _read_compact_mart(file_path), columns)
+
+def _load_mart(file_path, version, columns=None):
+    if SHARED_MARTS:
+        return _load_shared_mart(file_path, version, columns)
+    return _load_private_mart(file_path, version, columns)
+
+def mart_version(file_path):
+    if Path(file_path).name == RATING_HIST_MART:
+        return rating_facts_version(file_path)
+    return dataset_version(file_path)
+
+def data_version(file_path = 'df.csv'):
+    # Versão usada na chave dos fragmentos de página, nos dois backends
+    if BACKEND == "sqlite":
+        return get_database().version
+    return mart_version(resolve(file_path))
+
+@metrics.instrumented("load_data")
+def load_data(file_path = 'df.csv', columns=None):
+    if BACKEND == "sqlite":
+        if Path(file_path).name == RATING_HIST_MART:
+            return sql_query("rating_facts")
+        return get_database().frame(file_path, None, None if columns is None else list(columns))
+    file_path = resolve(file_path)
+    return _load_mart(file_path, mart_version(file_path), columns)
+
+# Dimensão de datas (date_id -> ano, trimestre, mês, dia da semana)
+@memo(max_entries=2)
+def _load_date_dimension(file_path, version):
+    return read_mart(file_path, compact_dtypes=True)
+
+def load_date_dimension(file_path = DATE_DIM_MART):
+    file_path = resolve(file_path)
+    return _load_date_dimension(file_path, dataset_version(file_path))
+
+# Cubo de vendas usado pelos gráficos do Geral.py
+@memo(max_entries=2)
+def _load_cube(file_path, version, columns=None):
+    date_dim_path = Path(file_path).with_name(DATE_DIM_MART)
+    return build_sales_cube(_load_mart(file_path, version, columns), load_date_dimension(date_dim_path))
+
+@metrics.instrumented("load_cube")
+def load_cube(file_path = 'df.csv', columns=None):
+    if BACKEND == "sqlite":
+        return sql_query("sales_cube")
+    file_path = resolve(file_path)
+    if approximate_enabled(file_path):
+        version = sample_version(file_path)
+        job = _exact_cube_job(file_path, version, columns)
+        return job.result() if job.done() else _load_sample_cube(file_path, version)
+    return _load_cube(file_path, mart_version(file_path), columns)
+
+@metrics.instrumented("filter_cube")
+def filter_cube(filters, file_path = 'df.csv', columns=None):
+    if BACKEND == "sqlite":
+        return sql_query("sales_cube", filters)
+    return slice_cube(load_cube(file_path = file_path, columns = columns), filters)
+
+# Amostra estratificada (df_sample.csv, ao lado do mart). Sua versão é a chave
+# do modo aproximado: calculá-la não exige ler o mart inteiro, e o ETL regrava
+# a amostra junto com o mart
+def sample_path(file_path = 'df.csv'):
+    from livraria.sampling import SAMPLE_MART
+
+    return Path(file_path).with_name(SAMPLE_MART)
+
+def sample_version(file_path = 'df.csv'):
+    return dataset_version(sample_path(resolve(file_path)))
+
+def approximate_enabled(file_path = 'df.csv'):
+    return APPROXIMATE and BACKEND != "sqlite" and sample_path(resolve(file_path)).exists()
+
+@memo(max_entries=2)
+def _load_sample_facts(file_path, version):
+    from livraria.sampling import read_sample, sample_facts
+
+    date_dim = load_date_dimension(Path(file_path).with_name(DATE_DIM_MART))
+    return sample_facts(read_sample(sample_path(file_path)), date_dim)
+
+@memo(max_entries=2)
+def _load_sample_cube(file_path, version):
+    from livraria.sampling import sample_cube
+
+    return sample_cube(_load_sample_facts(file_path, version))
+
+@memo()
+def _background():
+    return ThreadPoolExecutor(max_workers=1, thread_name_prefix="livraria-exact")
+
+def _build_exact_cube(file_path, columns=None):
+    # Fora do script (sem os caches do Streamlit): mesma montagem do _load_cube
+    date_dim = read_mart(Path(file_path).with_name(DATE_DIM_MART), compact_dtypes=True)
+    return build_sales_cube(_read_compact_mart(file_path, columns), date_dim)
+
+@memo(max_entries=2)
+def _exact_cube_job(file_path, version, columns=None):
+    # Um cálculo por versão da amostra, compartilhado por todas as sessões
+    return _background().submit(_build_exact_cube, file_path, columns)
+
+def cube_is_exact(file_path = 'df.csv', columns=None):
+    if not approximate_enabled(file_path):
+        return True
+    file_path = resolve(file_path)
+    return _exact_cube_job(file_path, sample_version(file_path), columns).done()
+
+def sales_bounds(filters=None, by=None, file_path = 'df.csv', columns=None):
+    # Estimativas com intervalo de 95% (vendas, receita, preço médio) enquanto
+    # os gráficos vêm da amostra; None quando os valores já são exatos
+    if cube_is_exact(file_path, columns):
+        return None
+    file_path = resolve(file_path)
+    from livraria.sampling import estimate
+
+    return estimate(_load_sample_facts(file_path, sample_version(file_path)), filters, by)
+
+# Índice de filtros (somente leitura, compartilhado entre sessões)
+@memo(max_entries=4)
+def _load_filter_index(file_path, version, columns=None):
+    return FilterIndex(_load_mart(file_path, version, columns))
+
+# Resultados de filtro memorizados entre sessões (LRU por bytes)
+@memo()
+def get_filter_cache():
+    return FilterCache()
+
+@memo(max_entries=4)
+def _filter_options(file_path, version, columns=None):
+    df = _load_mart(file_path, version, columns)
+    price = df["price"].astype("float64").round(2)
+    return df["genre_desc"].unique().tolist(), float(price.min()), float(price.max())
+
+@memo(max_entries=2)
+def _sample_options(file_path, version):
+    from livraria.sampling import read_sample, sample_options
+
+    return sample_options(read_sample(sample_path(file_path)))
+
+def filter_options(file_path = 'df.csv', columns=None):
+    if BACKEND == "sqlite":
+        return sql_query("filter_options", file_path)
+    file_path = resolve(file_path)
+    if approximate_enabled(file_path):
+        # Da amostra, mesmo depois do cubo exato: as opções (e o estado dos
+        # widgets) não mudam quando os valores são refinados
+        return _sample_options(file_path, sample_version(file_path))
+    return _filter_options(file_path, mart_version(file_path), columns)
+
+@metrics.instrumented("filter_data")
+def filter_data(rating=False, file_path = 'df.csv', filters=None, columns=None):
+
+    if filters is None:
+        from livraria.ui import sidebar_filters
+
+        filters = sidebar_filters(file_path = file_path, rating=rating, columns = columns)
+
+    if BACKEND == "sqlite":
+        # Filtro executado no banco, com o resultado completo como no pandas
+        # (a tabela paginada usa data_page)
+        if Path(file_path).name == RATING_HIST_MART:
+            return sql_query("rating_facts", filters)
+        return get_database().frame(file_path, filters, None if columns is None else list(columns))
+
+    file_path = resolve(file_path)
+    version = mart_version(file_path)
+    df = _load_mart(file_path, version, columns)
+    return df.iloc[_filtered_rows(file_path, version, filters, columns, rating)]
+
+def _filtered_rows(file_path, version, filters, columns=None, rating=False, order_by=None, ascending=True):
+    # Aplicar filtros pelo índice (interseção de posições, sem varrer colunas),
+    # reaproveitando o resultado de outras sessões com o mesmo estado.
+    # A projeção não muda as linhas, então não entra na chave.
+    key = filter_key(file_path, version, filters, rating=rating)
+    rows = get_filter_cache().get_or_compute(
+        key,
+        lambda: _load_filter_index(file_path, version, columns).positions(filters),
+    )
+    if order_by is None:
+        return rows
+
+    # Ordenação das linhas filtradas, também memorizada (posições na ordem pedida)
+    def sort_rows():
+        values = _load_mart(file_path, version, columns)[order_by].iloc[rows].reset_index(drop=True)
+        order = values.sort_values(ascending=ascending, kind="stable", na_position="last").index
+        return rows[order.to_numpy()]
+
+    return get_filter_cache().get_or_compute((*key, order_by, bool(ascending)), sort_rows)
+
+def filtered_row_count(filters, file_path = 'df.csv', columns=None, rating=False):
+    if BACKEND == "sqlite":
+        return sql_query("count", file_path, filters)
+    file_path = resolve(file_path)
+    return len(_filtered_rows(file_path, mart_version(file_path), filters, columns, rating))
+
+def data_columns(file_path = 'df.csv', columns=None):
+    if BACKEND == "sqlite":
+        return list(columns) if columns is not None else sql_query("columns", file_path)
+    file_path = resolve(file_path)
+    return _load_mart(file_path, mart_version(file_path), columns).columns.tolist()
+
+def data_page(filters, file_path = 'df.csv', columns=None, rating=False, page=0,
+              page_size=VIEWER_PAGE_ROWS, show_columns=None, order_by=None, ascending=True):
+    # Só a janela visível sai do backend: no SQLite vira LIMIT/OFFSET com
+    # ORDER BY no banco; no pandas, um recorte das posições filtradas
+    if BACKEND == "sqlite":
+        return sql_query(
+            "rows", file_path, filters, page_size, page * page_size,
+            None if show_columns is None else tuple(show_columns), order_by, ascending,
+        )
+
+    file_path = resolve(file_path)
+    version = mart_version(file_path)
+    df = _load_mart(file_path, version, columns)
+    rows = _filtered_rows(file_path, version, filters, columns, rating, order_by, ascending)
+    window = df.iloc[rows[page * page_size:(page + 1) * page_size]]
+    return window if show_columns is None else window[list(show_columns)]
+
+# Página de livros: busca e detalhes por livro a partir dos marts por livro
+# (pequenos, lidos dos CSVs do ETL também no modo SQLite)
+@memo(max_entries=2)
+def _load_book_lookup(file_path, version):
+    from livraria.books import BOOK_CATALOG_MART, BOOK_MONTHLY_MART, BOOK_SALES_MART, BookLookup
+
+    directory = Path(file_path).parent
+    return BookLookup(
+        read_mart(directory / BOOK_CATALOG_MART),
+        read_mart(directory / BOOK_SALES_MART),
+        read_mart(directory / BOOK_MONTHLY_MART),
+        read_mart(directory / RATING_HIST_MART),
+    )
+
+def book_lookup(file_path = 'book_catalog.csv'):
+    from livraria.books import BOOK_CATALOG_MART, BOOK_MONTHLY_MART, BOOK_SALES_MART
+
+    file_path = resolve(file_path)
+    directory = Path(file_path).parent
+    marts = [BOOK_CATALOG_MART, BOOK_SALES_MART, BOOK_MONTHLY_MART, RATING_HIST_MART]
+    version = "".join(dataset_version(directory / name) for name in marts)
+    return _load_book_lookup(file_path, version)
+
+def filtered_chunks(filters, file_path = 'df.csv', columns=None, rating=False):
+    # Linhas filtradas em blocos, sem montar o resultado inteiro
+    if BACKEND == "sqlite":
+        return get_database().iter_rows(file_path, filters, None if columns is None else list(columns))
+    file_path = resolve(file_path)
+    version = mart_version(file_path)
+    df = _load_mart(file_path, version, columns)
+    from livraria.export import frame_chunks
+
+    return frame_chunks(df, _filtered_rows(file_path, version, filters, columns, rating))
+
+
+# Aquecimento: os marts das duas páginas, com as mesmas chamadas (e chaves de
+# cache) das páginas, para o estado inicial da sidebar e os estados mais pedidos
+@st.cache_resource
+def get_filter_usage():
+    from livraria.usage import FilterUsage
+
+    return FilterUsage()
+
+def record_filter_usage(filters, file_path = 'df.csv', rating=False):
+    if WARMUP:
+        get_filter_usage().record(file_path, filters, rating)
+
+def warm_states(file_path, rating=False, columns=None, limit=WARMUP_STATES):
+    from livraria.usage import popular_states, usage_key
+
+    genres, min_price, max_price = filter_options(file_path, columns)
+    states = {}
+    for filters in [FilterState(tuple(genres), (min_price, max_price)),
+                    *popular_states(Path(file_path).name, rating, limit)]:
+        # Estados que a sidebar atual não produz mais (gênero ou preço fora das opções) ficam de fora
+        low, high = filters.price_range
+        if set(filters.genres) <= set(genres) and min_price <= low <= high <= max_price:
+            states.setdefault(usage_key(file_path, filters, rating), filters)
+    return list(states.values())
+
+def warm_caches(directory=None):
+    # `directory`: snapshot a preparar; sem ele, os marts de sempre (pelo
+    # nome, como as páginas os pedem)
+    sales = "df.csv" if directory is None else directory / "df.csv"
+    ratings = RATING_HIST_MART if directory is None else directory / RATING_HIST_MART
+    if approximate_enabled(sales):
+        _exact_cube_job(sales, sample_version(sales), SALES_COLUMNS).result()
+    load_cube(sales, SALES_COLUMNS)
+    load_data(ratings)
+    book_lookup('book_catalog.csv' if directory is None else directory / 'book_catalog.csv')
+    for filters in warm_states(sales, columns=SALES_COLUMNS):
+        filter_data(False, sales, filters, SALES_COLUMNS)
+    for filters in warm_states(ratings, rating=True):
+        filter_data(True, ratings, filters)
+
+def _warm_in_place():
+    # Sem snapshots o ETL regrava os marts no lugar: cada versão nova dos
+    # marts é aquecida quando aparece
+    versions = None
+    while True:
+        try:
+            current = (mart_version("df.csv"), mart_version(RATING_HIST_MART))
+            if current != versions:
+                warm_caches()
+                versions = current
+        except Exception:
+            logger.exception("Falha no aquecimento dos caches")
+        time.sleep(SNAPSHOT_POLL)
+
+@st.cache_resource
+def start_warmup():
+    # Uma vez por processo, na primeira execução do app. Com snapshots, o
+    # watcher aquece o publicado ao iniciar e cada snapshot novo antes da troca
+    if not WARMUP or BACKEND == "sqlite":
+        return None
+    if snapshots_enabled():
+        return get_snapshot_watcher()
+    thread = threading.Thread(target=_warm_in_place, name=WARMUP_THREAD, daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,36 @@
+import pandas as pd
+
+
+# Dimensão de datas com chave inteira (AAAAMMDD): os atributos de calendário
+# são calculados uma vez no ETL e os gráficos agrupam por inteiros pequenos
+DATE_DIM_MART = "date_dim.csv"
+
+
+def date_id(dates):
+    return (dates.dt.year * 10000 + dates.dt.month * 100 + dates.dt.day).astype("int32")
+
+
+def build_date_dimension(first_year, last_year):
+    dates = pd.Series(pd.date_range(f"{first_year}-01-01", f"{last_year}-12-31", freq="D"))
+    return pd.DataFrame({
+        "date_id": date_id(dates),
+        "date": dates,
+        "year": dates.dt.year,
+        "quarter": dates.dt.quarter,
+        "month": dates.dt.month,
+        "month_name": dates.dt.month_name(),
+        "weekday": dates.dt.weekday,
+        "weekday_name": dates.dt.day_name(),
+    })
+
+
+def lookup(date_dim, date_ids, attribute):
+    # Junta um atributo da dimensão às chaves date_id (busca vetorizada no índice)
+    # (get_indexer devolve -1 para chaves ausentes, que pegariam a última linha)
+    positions = pd.Index(date_dim["date_id"]).get_indexer(date_ids)
+    missing = positions < 0
+    if missing.any():
+        ids = pd.unique(pd.Series(date_ids)[missing])
+        raise ValueError(f"date_id fora da dimensão de datas: {', '.join(map(str, ids[:10]))}"
+                         + (f" (e mais {len(ids) - 10})" if len(ids) > 10 else ""))
+    return date_dim[attribute].to_numpy()[positions]
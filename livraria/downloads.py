@@ -0,0 +1,115 @@
+import gc
+import os
+import re
+import secrets
+import shutil
+import tempfile
+import threading
+import time
+from pathlib import Path
+from urllib.parse import quote
+
+import tornado.web
+
+from livraria.export import EXPORT_FORMATS
+
+
+# Download das exportações por uma rota própria no servidor Tornado do
+# Streamlit: o arquivo é gerado em disco e enviado em blocos, com
+# backpressure, sem passar inteiro pela memória (o st.download_button leria o
+# arquivo todo para a memória do servidor). Cada exportação fica num diretório
+# com um token aleatório, então qualquer processo do Streamlit na mesma máquina
+# serve o link, e os arquivos são apagados depois de LIVRARIA_EXPORT_TTL segundos.
+EXPORT_ROUTE = "livraria/export"
+EXPORT_TTL = float(os.environ.get("LIVRARIA_EXPORT_TTL", 3600))
+SEND_CHUNK_BYTES = 1 << 20
+TOKEN = re.compile(r"^[A-Za-z0-9_-]{16,64}$")
+
+_install_lock = threading.Lock()
+_installed = False
+
+
+def export_dir():
+    return Path(os.environ.get("LIVRARIA_EXPORT_DIR", Path(tempfile.gettempdir()) / "livraria-exports"))
+
+
+def _mime(file_name):
+    extension = Path(file_name).suffix.lstrip(".")
+    return next((mime for ext, mime in EXPORT_FORMATS.values() if ext == extension), "application/octet-stream")
+
+
+class ExportHandler(tornado.web.RequestHandler):
+
+    def initialize(self, directory):
+        self.directory = Path(directory)
+
+    async def get(self, token, file_name):
+        if not TOKEN.match(token) or "/" in file_name or file_name in (".", ".."):
+            raise tornado.web.HTTPError(404)
+        path = self.directory / token / file_name
+        if not path.is_file():
+            raise tornado.web.HTTPError(404)
+
+        self.set_header("Content-Type", _mime(file_name))
+        self.set_header("Content-Disposition", f"attachment; filename*=UTF-8''{quote(file_name)}")
+        self.set_header("Content-Length", path.stat().st_size)
+        self.set_header("Cache-Control", "no-store")
+        with open(path, "rb") as f:
+            while chunk := f.read(SEND_CHUNK_BYTES):
+                self.write(chunk)
+                # Só lê o próximo bloco depois que o anterior saiu para o cliente
+                await self.flush()
+
+
+def _server_app():
+    # O Streamlit não expõe a aplicação Tornado; ela é encontrada entre os
+    # objetos vivos do processo (não existe sem servidor, ex.: AppTest)
+    apps = [obj for obj in gc.get_objects() if isinstance(obj, tornado.web.Application)]
+    return apps[0] if len(apps) == 1 else None
+
+
+def install_route():
+    # Registra a rota uma vez por processo; False quando não há servidor
+    global _installed
+    with _install_lock:
+        if _installed:
+            return True
+        app = _server_app()
+        if app is None:
+            return False
+        from streamlit import config
+        from streamlit.web.server.server_util import make_url_path_regex
+
+        base = config.get_option("server.baseUrlPath")
+        pattern = make_url_path_regex(base, EXPORT_ROUTE, r"(?P<token>[^/]+)/(?P<file_name>[^/]+)",
+                                      trailing_slash="prohibited")
+        # add_handlers coloca a rota antes da rota genérica dos arquivos do frontend
+        app.add_handlers(r".*", [(pattern, ExportHandler, {"directory": str(export_dir())})])
+        _installed = True
+        return True
+
+
+def export_url(path):
+    from streamlit import config
+
+    base = config.get_option("server.baseUrlPath").strip("/")
+    parts = [base, EXPORT_ROUTE, path.parent.name, quote(path.name)]
+    return "/" + "/".join(part for part in parts if part)
+
+
+def prune_exports(max_age=EXPORT_TTL):
+    oldest = time.time() - max_age
+    for directory in export_dir().glob("*"):
+        try:
+            if directory.is_dir() and directory.stat().st_mtime < oldest:
+                shutil.rmtree(directory, ignore_errors=True)
+        except OSError:
+            continue
+
+
+def new_export_path(file_name):
+    # Arquivo da exportação num diretório novo com token aleatório
+    prune_exports()
+    directory = export_dir() / secrets.token_urlsafe(24)
+    directory.mkdir(parents=True)
+    return directory / file_name
@@ -0,0 +1,404 @@
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from livraria.books import (
+    BOOK_CATALOG_MART, BOOK_MONTHLY_MART, BOOK_SALES_MART, add_sales, book_sales, build_catalog,
+)
+from livraria.dates import DATE_DIM_MART, build_date_dimension, date_id
+from livraria.ratings import EDITIONS_MART, RATING_HIST_MART, build_rating_histograms
+from livraria.sales_reader import read_sales
+from livraria.sampling import SAMPLE_MART, empty_sample, read_sample, update_sample, write_sample
+from livraria.snapshots import KEEP_SNAPSHOTS, create_snapshot, current_snapshot, prune, publish
+from livraria.sql_backend import build_database
+from livraria.storage import file_hash, unique_orders
+
+
+# Pipeline que gera os marts consumidos pelo dashboard (antes feito à mão no start.ipynb)
+SOURCE_TABLES = [
+    "author", "book", "edition", "award", "format", "genders",
+    "info", "publisher", "ratings", "sales", "series",
+]
+SALES_MART = "df.csv"
+RATINGS_MARTS = [EDITIONS_MART, RATING_HIST_MART]
+STATE_FILE = ".etl_state.json"
+
+# Tabelas das quais cada mart depende (exceto sales, tratada pelo watermark)
+SALES_MART_DIMENSIONS = ["book", "info", "genders", "author", "edition"]
+RATINGS_MART_INPUTS = ["book", "ratings", "edition", "format", "info", "genders"]
+BOOK_CATALOG_INPUTS = ["book", "edition", "format", "info", "genders", "author", "publisher"]
+
+# Leitura das tabelas em threads (o parser C do pandas solta o GIL durante a
+# maior parte da leitura) e os dois marts, independentes, em processos
+# separados quando há mais de um núcleo
+READ_WORKERS = 8
+MART_PROCESSES = 2 if (os.cpu_count() or 1) > 1 else 1
+
+logger = logging.getLogger(__name__)
+
+
+@contextmanager
+def stage(timings, name):
+    # Cronometra uma etapa do ETL e registra o tempo em timings[name]
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[name] = time.perf_counter() - start
+        logger.info("etapa %-22s %8.2fs", name, timings[name])
+
+
+def read_sources(data_dir, tables=SOURCE_TABLES, workers=READ_WORKERS):
+    tables = list(tables)
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(tables)))) as pool:
+        frames = pool.map(lambda name: pd.read_csv(Path(data_dir) / f"{name}.csv"), tables)
+        return dict(zip(tables, frames))
+
+
+def build_book_dimension(tables):
+    book_gender = pd.merge(tables["book"], tables["info"], how='inner', on='book_id')
+    book_gender = pd.merge(book_gender, tables["genders"], how='inner', on='genre_id')
+    book_gender = pd.merge(book_gender, tables["author"], how='inner', on='author_id')
+    book_gender = pd.merge(book_gender, tables["edition"], how='inner', on='book_id')
+
+    # Converter para data
+    book_gender['birthday'] = pd.to_datetime(book_gender['birthday'], format='%d/%m/%Y')
+    book_gender['publication_date'] = pd.to_datetime(book_gender['publication_date'], format='%d/%m/%Y')
+    return book_gender
+
+
+def build_sales_mart(book_dimension, sales):
+    # sales é um bloco já tipado pelo SalesReader
+    book_gender = pd.merge(book_dimension, sales, how='inner', on='isbn')
+    book_gender = book_gender.drop(['book_id', 'format_id', 'author_id', 'genre_id', 'series_id', 'isbn', 'pub_id', 'volume_number', 'item_id'], axis=1)
+
+    # Colunas derivadas materializadas uma vez aqui, e não a cada rerun do dashboard
+    book_gender['date_id'] = date_id(book_gender['sale_date'])
+    book_gender['total_discount'] = (book_gender['price'] * book_gender['discount'].fillna(0)).round(4)
+    return book_gender
+
+
+def write_date_dimension(out_dir, first_year, last_year):
+    # Cobre os anos completos das vendas
+    build_date_dimension(first_year, last_year).to_csv(Path(out_dir) / DATE_DIM_MART, index=False)
+    return [first_year, last_year]
+
+
+def build_edition_facts(tables):
+    editions = pd.merge(tables["book"], tables["edition"], how='inner', on='book_id')
+    editions = pd.merge(editions, tables["format"], how='inner', on='format_id')
+    editions = pd.merge(editions, tables["info"][['genre_id', 'book_id']], how='inner', on='book_id')
+    editions = pd.merge(editions, tables["genders"], how='inner', on='genre_id')
+
+    editions['publication_date'] = pd.to_datetime(editions['publication_date'], format='%d/%m/%Y')
+    editions = editions.drop(columns=['author_id', 'isbn', 'format_id', 'genre_id', 'pub_id', 'print_run_size_k'], axis=1)
+    return editions
+
+
+def build_ratings_marts(tables, out_dir):
+    # Fatos por edição + histograma de estrelas por livro (sem uma linha por avaliação × edição)
+    editions = build_edition_facts(tables)
+    hist = build_rating_histograms(tables["ratings"])
+    _write_mart(editions, Path(out_dir) / EDITIONS_MART)
+    _write_mart(hist, Path(out_dir) / RATING_HIST_MART)
+    return editions, hist
+
+
+def _order_key(order_id):
+    # order_id tem o formato "<lote>-<sequência>"; compara numericamente
+    batch, _, seq = str(order_id).partition("-")
+    return int(batch), int(seq or 0)
+
+
+def advance_watermark(watermark, sales):
+    if sales.empty:
+        return watermark
+    last_date = sales["sale_date"].max()
+    last_order = max(sales.loc[sales["sale_date"] == last_date, "order_id"], key=_order_key)
+    if watermark is not None and (pd.Timestamp(watermark["sale_date"]), _order_key(watermark["order_id"])) >= (last_date, _order_key(last_order)):
+        return watermark
+    return {"sale_date": last_date.strftime('%Y-%m-%d'), "order_id": last_order}
+
+
+def past_watermark(sales, watermark):
+    if watermark is None:
+        return sales
+    last_date = pd.Timestamp(watermark["sale_date"])
+    last_order = _order_key(watermark["order_id"])
+    same_day_newer = (sales["sale_date"] == last_date) & sales["order_id"].map(lambda o: _order_key(o) > last_order)
+    return sales[(sales["sale_date"] > last_date) | same_day_newer]
+
+
+def load_state(out_dir):
+    try:
+        return json.loads((Path(out_dir) / STATE_FILE).read_text())
+    except (OSError, ValueError):
+        return None
+
+
+def save_state(out_dir, state):
+    state_path = Path(out_dir) / STATE_FILE
+    tmp_path = state_path.with_name(f"{state_path.name}.{os.getpid()}.tmp")
+    tmp_path.write_text(json.dumps(state, indent=2))
+    os.replace(tmp_path, state_path)
+
+
+def input_hashes(data_dir, tables):
+    return {name: file_hash(Path(data_dir) / f"{name}.csv") for name in tables}
+
+
+def _write_mart(data, path, start_index=0, append=False):
+    data = data.set_axis(pd.RangeIndex(start_index, start_index + len(data)))
+    data.to_csv(path, mode="a" if append else "w", header=not append)
+
+
+def read_book_sales(out_dir):
+    return (
+        pd.read_csv(Path(out_dir) / BOOK_SALES_MART, dtype={"isbn": str}),
+        pd.read_csv(Path(out_dir) / BOOK_MONTHLY_MART, dtype={"book_id": str}),
+    )
+
+
+def write_book_sales(out_dir, by_edition, monthly):
+    by_edition.round({"revenue": 2, "total_discount": 4}).to_csv(Path(out_dir) / BOOK_SALES_MART, index=False)
+    monthly.round({"revenue": 2}).to_csv(Path(out_dir) / BOOK_MONTHLY_MART, index=False)
+
+
+def _append_sales(book_dimension, sales_reader, mart_path, start_index, watermark=None, append=True, sample=None,
+                  by_book=(None, None)):
+    # Junta e grava bloco a bloco: a memória fica limitada ao tamanho do bloco.
+    # A amostra estratificada (se houver) é atualizada com cada bloco; como o
+    # dashboard, conta só a primeira linha de cada pedido (um pedido pode
+    # atravessar a fronteira entre dois blocos). As vendas por livro contam
+    # todos os itens e são somadas às já gravadas (`by_book`)
+    by_edition, monthly = by_book
+    rows = 0
+    new_watermark = watermark
+    first_year = None
+    rng = np.random.default_rng(start_index)
+    previous_orders = pd.Index([])
+    for chunk in sales_reader:
+        chunk = past_watermark(chunk, watermark)
+        if chunk.empty:
+            continue
+        sales_mart = build_sales_mart(book_dimension, chunk)
+        _write_mart(sales_mart, mart_path, start_index=start_index + rows, append=append or rows > 0)
+        rows += len(sales_mart)
+        if sample is not None:
+            orders = unique_orders(sales_mart)
+            sample = update_sample(sample, orders[~orders["order_id"].isin(previous_orders)], rng)
+            previous_orders = pd.Index(orders["order_id"])
+        chunk_by_edition, chunk_monthly = book_sales(book_dimension, chunk)
+        by_edition = add_sales(by_edition, chunk_by_edition, ["isbn"])
+        monthly = add_sales(monthly, chunk_monthly, ["book_id", "month"])
+        new_watermark = advance_watermark(new_watermark, chunk)
+        chunk_first_year = int(chunk["sale_date"].min().year)
+        first_year = chunk_first_year if first_year is None else min(first_year, chunk_first_year)
+    if rows == 0 and not append:
+        _write_mart(build_sales_mart(book_dimension, sales_reader.empty_chunk()), mart_path)
+    if sample is not None:
+        write_sample(sample, Path(mart_path).with_name(SAMPLE_MART))
+    if by_edition is None:
+        by_edition, monthly = book_sales(book_dimension, sales_reader.empty_chunk())
+    write_book_sales(Path(mart_path).parent, by_edition, monthly)
+    logger.info(
+        "%d linhas de vendas lidas (%d corrigidas, %d descartadas)",
+        sales_reader.rows, sales_reader.repaired_rows, sales_reader.invalid_rows,
+    )
+    return rows, new_watermark, first_year
+
+
+def sales_stage(data_dir, out_dir, chunksize=100_000, offset=0, start_index=0, watermark=None, append=False):
+    # Mart de vendas: só as dimensões que ele usa, e sales.csv em blocos
+    timings = {}
+    with stage(timings, "vendas: leitura dims"):
+        tables = read_sources(data_dir, SALES_MART_DIMENSIONS)
+    with stage(timings, "vendas: dimensão livro"):
+        book_dimension = build_book_dimension(tables)
+    sales_reader = read_sales(Path(data_dir) / "sales.csv", chunksize=chunksize, offset=offset)
+    # Carga incremental sem amostra anterior (marts de antes da amostragem): a
+    # amostra não é mantida até o próximo build completo
+    sample = read_sample(Path(out_dir) / SAMPLE_MART) if append else empty_sample()
+    by_book = read_book_sales(out_dir) if append else (None, None)
+    with stage(timings, "vendas: mart"):
+        rows, watermark, first_year = _append_sales(
+            book_dimension, sales_reader, Path(out_dir) / SALES_MART, start_index=start_index,
+            watermark=watermark, append=append, sample=sample, by_book=by_book,
+        )
+    return {
+        "rows": rows,
+        "watermark": watermark,
+        "first_year": first_year,
+        "end_offset": sales_reader.end_offset,
+        "invalid_rows": sales_reader.invalid_rows,
+        "timings": timings,
+    }
+
+
+def ratings_stage(data_dir, out_dir):
+    timings = {}
+    with stage(timings, "avaliações: leitura"):
+        tables = read_sources(data_dir, RATINGS_MART_INPUTS)
+    with stage(timings, "avaliações: marts"):
+        editions, hist = build_ratings_marts(tables, out_dir)
+    return {"editions": len(editions), "books": len(hist), "timings": timings}
+
+
+def catalog_stage(data_dir, out_dir):
+    timings = {}
+    with stage(timings, "catálogo: leitura"):
+        tables = read_sources(data_dir, BOOK_CATALOG_INPUTS)
+    with stage(timings, "catálogo: mart"):
+        catalog = build_catalog(tables)
+        catalog.to_csv(Path(out_dir) / BOOK_CATALOG_MART, index=False)
+    return {"editions": len(catalog), "timings": timings}
+
+
+def _init_worker(level):
+    # Processos "spawn" não herdam a configuração de log do pai
+    logging.basicConfig(level=level, format="%(asctime)s %(levelname)s %(processName)s %(message)s")
+
+
+def run_stages(tasks, processes=MART_PROCESSES):
+    # tasks: {nome: (função, argumentos)}. Cada processo lê só as próprias
+    # entradas, então a memória de pico é a do maior mart, não a soma de tudo
+    if processes <= 1 or len(tasks) < 2:
+        return {name: fn(*args) for name, (fn, args) in tasks.items()}
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(
+        max_workers=min(processes, len(tasks)), mp_context=context,
+        initializer=_init_worker, initargs=(logging.getLogger().getEffectiveLevel(),),
+    ) as pool:
+        futures = {name: pool.submit(fn, *args) for name, (fn, args) in tasks.items()}
+        return {name: future.result() for name, future in futures.items()}
+
+
+def build_full(data_dir, out_dir, chunksize=100_000, processes=MART_PROCESSES):
+    start = time.perf_counter()
+    results = run_stages({
+        "sales": (sales_stage, (data_dir, out_dir, chunksize)),
+        "ratings": (ratings_stage, (data_dir, out_dir)),
+        "catalog": (catalog_stage, (data_dir, out_dir)),
+    }, processes)
+    sales, ratings = results["sales"], results["ratings"]
+
+    watermark = sales["watermark"]
+    date_range = None
+    if watermark is not None:
+        date_range = write_date_dimension(out_dir, sales["first_year"], int(watermark["sale_date"][:4]))
+
+    state = {
+        "watermark": watermark,
+        "date_range": date_range,
+        "sales_offset": sales["end_offset"],
+        "sales_mart_rows": sales["rows"],
+        "dimension_hashes": input_hashes(data_dir, SALES_MART_DIMENSIONS),
+        "ratings_hashes": input_hashes(data_dir, RATINGS_MART_INPUTS),
+        "catalog_hashes": input_hashes(data_dir, BOOK_CATALOG_INPUTS),
+    }
+    save_state(out_dir, state)
+    logger.info(
+        "Build completo em %.2fs: %d vendas (%d linhas de vendas descartadas), %d edições, %d livros avaliados",
+        time.perf_counter() - start, sales["rows"], sales["invalid_rows"], ratings["editions"], ratings["books"],
+    )
+    return state
+
+
+def build_incremental(data_dir, out_dir, chunksize=100_000, processes=MART_PROCESSES):
+    state = load_state(out_dir)
+    sales_path = Path(data_dir) / "sales.csv"
+    if (
+        state is None
+        or not all((Path(out_dir) / name).exists() for name in [SALES_MART, BOOK_SALES_MART, BOOK_MONTHLY_MART])
+        or os.path.getsize(sales_path) < state["sales_offset"]
+        or input_hashes(data_dir, SALES_MART_DIMENSIONS) != state["dimension_hashes"]
+    ):
+        # Sem estado confiável (primeira carga, dimensões alteradas ou sales.csv reescrito)
+        logger.info("Estado incremental inválido, executando build completo")
+        return build_full(data_dir, out_dir, chunksize=chunksize, processes=processes)
+
+    start = time.perf_counter()
+    tasks = {
+        "sales": (sales_stage, (
+            data_dir, out_dir, chunksize, state["sales_offset"], state["sales_mart_rows"], state["watermark"], True,
+        )),
+    }
+    ratings_hashes = input_hashes(data_dir, RATINGS_MART_INPUTS)
+    if ratings_hashes != state["ratings_hashes"] or not all((Path(out_dir) / name).exists() for name in RATINGS_MARTS):
+        tasks["ratings"] = (ratings_stage, (data_dir, out_dir))
+        state["ratings_hashes"] = ratings_hashes
+    catalog_hashes = input_hashes(data_dir, BOOK_CATALOG_INPUTS)
+    if catalog_hashes != state.get("catalog_hashes") or not (Path(out_dir) / BOOK_CATALOG_MART).exists():
+        tasks["catalog"] = (catalog_stage, (data_dir, out_dir))
+        state["catalog_hashes"] = catalog_hashes
+    sales = run_stages(tasks, processes)["sales"]
+
+    new_rows, state["watermark"], first_year = sales["rows"], sales["watermark"], sales["first_year"]
+    # A dimensão de datas só é regravada quando as vendas chegam a um ano novo
+    date_range = state.get("date_range")
+    if state["watermark"] is not None:
+        last_year = int(state["watermark"]["sale_date"][:4])
+        if date_range is None or last_year > date_range[1] or not (Path(out_dir) / DATE_DIM_MART).exists():
+            first_year = date_range[0] if date_range else first_year
+            state["date_range"] = write_date_dimension(out_dir, first_year, last_year)
+    state["sales_mart_rows"] += new_rows
+    state["sales_offset"] = sales["end_offset"]
+    logger.info(
+        "Build incremental em %.2fs: %d novas vendas (%d linhas de vendas descartadas)",
+        time.perf_counter() - start, new_rows, sales["invalid_rows"],
+    )
+
+    save_state(out_dir, state)
+    return state
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Gera os marts do dashboard (vendas e avaliações) a partir de data/")
+    parser.add_argument("--data-dir", default="data", help="Diretório com os CSVs de origem")
+    parser.add_argument("--out-dir", default=".", help="Diretório onde os marts são gravados")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Anexa apenas as vendas novas após o último watermark")
+    parser.add_argument("--chunksize", type=int, default=100_000,
+                        help="Linhas de sales.csv processadas por bloco")
+    parser.add_argument("--processes", type=int, default=MART_PROCESSES,
+                        help="Processos para os marts de vendas e avaliações (1 = sequencial)")
+    parser.add_argument("--sqlite", metavar="DB_PATH",
+                        help="Também grava os marts num banco SQLite (backend LIVRARIA_BACKEND=sqlite)")
+    parser.add_argument("--snapshot-root", metavar="DIR",
+                        help="Grava os marts num snapshot novo em DIR e o publica no fim (no lugar de --out-dir)")
+    parser.add_argument("--keep", type=int, default=KEEP_SNAPSHOTS,
+                        help="Snapshots mantidos em --snapshot-root (o publicado conta)")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    out_dir = args.out_dir
+    if args.snapshot_root:
+        # A carga incremental parte de uma cópia do snapshot publicado, que
+        # continua intacto para quem ainda o lê
+        base = current_snapshot(args.snapshot_root) if args.incremental else None
+        out_dir = create_snapshot(args.snapshot_root, base)
+    if args.incremental:
+        build_incremental(args.data_dir, out_dir, chunksize=args.chunksize, processes=args.processes)
+    else:
+        build_full(args.data_dir, out_dir, chunksize=args.chunksize, processes=args.processes)
+    if args.sqlite:
+        timings = {}
+        with stage(timings, "banco SQLite"):
+            build_database(out_dir, args.sqlite, chunksize=args.chunksize)
+        logger.info("Banco SQLite gravado em %s", args.sqlite)
+    if args.snapshot_root:
+        publish(args.snapshot_root, out_dir)
+        prune(args.snapshot_root, args.keep)
+
+
+if __name__ == "__main__":
+    main()
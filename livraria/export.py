@@ -0,0 +1,47 @@
+# Exportação dos dados filtrados em blocos: cada bloco é escrito e descartado,
+# então o resultado inteiro não passa pela memória. O arquivo final fica em
+# disco e é enviado em blocos pela rota de livraria.downloads
+EXPORT_CHUNK_ROWS = 50_000
+EXPORT_FORMATS = {
+    "CSV": ("csv", "text/csv"),
+    "Parquet": ("parquet", "application/vnd.apache.parquet"),
+}
+
+
+def frame_chunks(df, rows, chunk_rows=EXPORT_CHUNK_ROWS):
+    # Posições filtradas (ex.: do FilterIndex) -> blocos do mart
+    for start in range(0, len(rows), chunk_rows):
+        yield df.iloc[rows[start:start + chunk_rows]]
+
+
+def write_csv(chunks, sink):
+    header = True
+    for chunk in chunks:
+        sink.write(chunk.to_csv(index=False, header=header).encode("utf-8"))
+        header = False
+
+
+def write_parquet(chunks, sink):
+    # Um row group por bloco; o esquema do primeiro bloco vale para todos
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    writer = None
+    try:
+        for chunk in chunks:
+            if writer is None:
+                schema = pa.Schema.from_pandas(chunk, preserve_index=False)
+                writer = pq.ParquetWriter(sink, schema)
+            writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+def export_chunks(chunks, export_format, sink):
+    if export_format == "CSV":
+        write_csv(chunks, sink)
+    elif export_format == "Parquet":
+        write_parquet(chunks, sink)
+    else:
+        raise ValueError(f"Formato de exportação desconhecido: {export_format}")
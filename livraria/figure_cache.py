@@ -0,0 +1,100 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+from livraria.storage import CACHE_DIR_NAME, _write_atomic
+
+
+FIGURE_CACHE_BYTES = 128 * 1024 * 1024
+# Outros processos também gravam no diretório: o total é recontado de tempos em tempos
+RESCAN_INTERVAL = 60
+
+
+def figure_cache_dir():
+    return Path(os.environ.get("LIVRARIA_CACHE_DIR", CACHE_DIR_NAME)) / "figures"
+
+
+class FigureCache:
+    # Cache em disco do JSON das figuras Plotly, compartilhado por todos os
+    # processos do servidor na mesma máquina. A chave é (gráfico, versão do
+    # dataset, filtros normalizados, código que monta o gráfico); o mtime de
+    # cada arquivo marca o último acesso e os mais antigos são removidos quando
+    # o diretório passa do limite. O tamanho do diretório é mantido num total
+    # corrente, e o diretório só é varrido quando ele passa do limite (ou a
+    # cada RESCAN_INTERVAL, para contar o que os outros processos gravaram).
+
+    def __init__(self, cache_dir, max_bytes=FIGURE_CACHE_BYTES):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._bytes = None
+        self._scanned_at = 0.0
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, key):
+        digest = hashlib.sha256(json.dumps(key, default=str).encode()).hexdigest()
+        return self.cache_dir / f"{digest}.json"
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            text = path.read_text()
+            os.utime(path)
+        except FileNotFoundError:
+            # Ausente ou removido por outro processo entre a leitura e o utime
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return text
+
+    def put(self, key, text):
+        if len(text) > self.max_bytes:
+            return
+        _write_atomic(self._path(key), lambda p: p.write_text(text))
+        with self._lock:
+            stale = self._bytes is None or time.monotonic() - self._scanned_at >= RESCAN_INTERVAL
+            if not stale:
+                self._bytes += len(text)
+            due = stale or self._bytes > self.max_bytes
+        if due:
+            self.evict()
+
+    def evict(self):
+        entries = []
+        for path in self.cache_dir.glob("*.json"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime_ns, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                path.unlink()
+                with self._lock:
+                    self.evictions += 1
+            except FileNotFoundError:
+                pass
+            total -= size
+        with self._lock:
+            self._bytes = total
+            self._scanned_at = time.monotonic()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
@@ -0,0 +1,78 @@
+import threading
+from collections import OrderedDict
+
+
+def filter_key(file_path, version, filters, rating=False):
+    # Normaliza o estado da sidebar: a ordem de seleção dos gêneros não importa
+    return (
+        str(file_path),
+        version,
+        tuple(sorted(filters.genres)),
+        tuple(float(p) for p in filters.price_range),
+        bool(filters.discount_only),
+        bool(rating),
+    )
+
+
+class FilterCache:
+    # Cache LRU das posições filtradas, limitado pelo tamanho em bytes e
+    # compartilhado entre sessões. Entradas de versões antigas de um dataset
+    # são descartadas quando uma versão nova aparece.
+
+    def __init__(self, max_bytes=64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._versions = {}
+        self._lock = threading.Lock()
+
+    def _invalidate(self, file_path, version):
+        if self._versions.get(file_path) == version:
+            return
+        self._versions[file_path] = version
+        for key in [k for k in self._entries if k[0] == file_path and k[1] != version]:
+            self._bytes -= self._entries.pop(key).nbytes
+
+    def discard(self, file_paths):
+        # Remove todas as entradas dos datasets (ex.: de um snapshot liberado)
+        file_paths = set(file_paths)
+        with self._lock:
+            for key in [k for k in self._entries if k[0] in file_paths]:
+                self._bytes -= self._entries.pop(key).nbytes
+            for file_path in file_paths:
+                self._versions.pop(file_path, None)
+
+    def get_or_compute(self, key, compute):
+        with self._lock:
+            self._invalidate(key[0], key[1])
+            rows = self._entries.get(key)
+            if rows is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return rows
+            self.misses += 1
+
+        rows = compute()
+        rows.setflags(write=False)
+        with self._lock:
+            if key not in self._entries and rows.nbytes <= self.max_bytes:
+                self._entries[key] = rows
+                self._bytes += rows.nbytes
+                while self._bytes > self.max_bytes:
+                    _, evicted = self._entries.popitem(last=False)
+                    self._bytes -= evicted.nbytes
+                    self.evictions += 1
+        return rows
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
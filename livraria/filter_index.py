@@ -0,0 +1,56 @@
+import numpy as np
+
+
+class FilterIndex:
+    # Índice pré-construído dos filtros da sidebar: posições por gênero,
+    # permutação ordenada por preço (consultada com searchsorted) e conjunto
+    # de linhas com desconto. Um FilterState vira posições de linha por
+    # interseção de índices, sem varrer as colunas a cada rerun.
+
+    def __init__(self, df):
+        self.n_rows = len(df)
+        self.genre_rows = {
+            genre: np.asarray(rows, dtype=np.int64)
+            for genre, rows in df.groupby("genre_desc", observed=True).indices.items()
+        }
+
+        # Preços em float64 arredondados ao centavo: o slider compara com valores exatos
+        price = df["price"].to_numpy(dtype=float).round(2)
+        self.price_order = np.argsort(price, kind="stable")
+        self.sorted_prices = price[self.price_order]
+
+        self.discounted = None
+        if "discount" in df.columns:
+            self.discounted = (df["discount"] > 0).to_numpy()
+
+    def _price_mask(self, price_range):
+        lo = np.searchsorted(self.sorted_prices, price_range[0], side="left")
+        hi = np.searchsorted(self.sorted_prices, price_range[1], side="right")
+        if lo == 0 and hi == self.n_rows:
+            return None
+        mask = np.zeros(self.n_rows, dtype=bool)
+        mask[self.price_order[lo:hi]] = True
+        return mask
+
+    def _genre_positions(self, genres):
+        selected = [self.genre_rows[g] for g in genres if g in self.genre_rows]
+        if len(selected) == len(self.genre_rows):
+            return None
+        if not selected:
+            return np.empty(0, dtype=np.int64)
+        return np.sort(np.concatenate(selected))
+
+    def positions(self, filters):
+        rows = self._genre_positions(filters.genres)
+        price_mask = self._price_mask(filters.price_range)
+        discount_mask = self.discounted if filters.discount_only else None
+
+        if rows is None:
+            # Todos os gêneros: parte do filtro de preço (ou de todas as linhas)
+            rows = np.arange(self.n_rows) if price_mask is None else np.flatnonzero(price_mask)
+        elif price_mask is not None:
+            rows = rows[price_mask[rows]]
+
+        if discount_mask is not None:
+            rows = rows[discount_mask[rows]]
+        return rows
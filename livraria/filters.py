@@ -0,0 +1,13 @@
+from dataclasses import dataclass
+
+
+DISCOUNT_OPTIONS = ("Todos os produtos", "Apenas com desconto")
+
+
+# Estado dos filtros da sidebar, independente dos widgets do Streamlit
+@dataclass(frozen=True)
+class FilterState:
+    genres: tuple
+    price_range: tuple
+    discount_only: bool = False
+
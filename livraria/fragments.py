@@ -0,0 +1,122 @@
+import hashlib
+import marshal
+import threading
+from dataclasses import fields
+from functools import lru_cache
+from pathlib import Path
+
+import plotly.io as pio
+import streamlit as st
+
+from livraria.figure_cache import FigureCache, figure_cache_dir
+from livraria.filters import FilterState
+from livraria.metrics import timed
+
+
+FILTER_FIELDS = tuple(field.name for field in fields(FilterState))
+
+# Chamadas de fragmentos e quantas precisaram montar o resultado (miss no cache em memória)
+_stats = {"calls": 0, "builds": 0}
+_stats_lock = threading.Lock()
+
+
+def _normalize(name, value):
+    # Mesma normalização do filter_key: a ordem dos gêneros não importa
+    if name == "genres":
+        return tuple(sorted(value))
+    if name == "price_range":
+        return tuple(float(p) for p in value)
+    return bool(value)
+
+
+@st.cache_resource
+def get_figure_cache():
+    return FigureCache(figure_cache_dir())
+
+
+def _cached_figure(key, build, filters):
+    # Segundo nível, em disco: outro processo pode já ter montado a mesma figura
+    cache = get_figure_cache()
+    text = cache.get(key)
+    if text is not None:
+        return pio.from_json(text)
+    fig = build(filters)
+    cache.put(key, fig.to_json())
+    return fig
+
+
+@lru_cache(maxsize=None)
+def _file_hash(path):
+    return hashlib.sha256(Path(path).read_bytes()).hexdigest()
+
+
+def code_fingerprint(build):
+    # Versão do código que monta o bloco, para o cache em disco (que sobrevive
+    # a deploys): o arquivo da página (o bloco e as funções auxiliares dela) e
+    # os módulos do pacote livraria (agregações, histogramas etc.). Sem o
+    # arquivo, o bytecode do próprio bloco
+    digest = hashlib.sha256()
+    try:
+        digest.update(_file_hash(build.__code__.co_filename).encode())
+    except OSError:
+        digest.update(marshal.dumps(build.__code__))
+    for path in sorted(Path(__file__).parent.glob("*.py")):
+        digest.update(_file_hash(path).encode())
+    return digest.hexdigest()[:16]
+
+
+def _metric_name(fragment_id):
+    # "…/Geral.py:monthly_sales_chart" -> "Geral.monthly_sales_chart"
+    filename, qualname = fragment_id.rsplit(":", 1)
+    return f"{Path(filename).stem}.{qualname}"
+
+
+@st.cache_data(max_entries=256, show_spinner=False)
+def _render(fragment_id, version, inputs, _build, _filters):
+    # _build e _filters não entram no hash: a chave é (bloco, versão, entradas declaradas)
+    with _stats_lock:
+        _stats["builds"] += 1
+    with timed(f"build:{_metric_name(fragment_id)}"):
+        return _build(_filters)
+
+
+def fragment_stats():
+    with _stats_lock:
+        return {"calls": _stats["calls"], "hits": _stats["calls"] - _stats["builds"], "misses": _stats["builds"]}
+
+
+def fragment(depends_on=FILTER_FIELDS, figure=False):
+    # Bloco de página (KPIs, gráfico) que declara de quais campos do FilterState
+    # depende. O resultado é cacheado por (versão do dataset, campos declarados):
+    # mexer em um filtro só recalcula os blocos que o usam, e blocos sem
+    # dependências são calculados uma vez por versão do dataset.
+    # O bloco não deve ler campos do filtro que não declarou.
+    unknown = set(depends_on) - set(FILTER_FIELDS)
+    if unknown:
+        raise ValueError(f"Campos de filtro desconhecidos: {sorted(unknown)}")
+
+    def decorator(build):
+        fragment_id = f"{build.__code__.co_filename}:{build.__qualname__}"
+        fingerprint = code_fingerprint(build) if figure else None
+
+        def render(version, filters=None):
+            inputs = tuple(
+                (name, _normalize(name, getattr(filters, name))) for name in depends_on
+            )
+            with _stats_lock:
+                _stats["calls"] += 1
+            if figure:
+                key = (fragment_id, fingerprint, version, inputs)
+                return _render(fragment_id, version, inputs, lambda f: _cached_figure(key, build, f), filters)
+            return _render(fragment_id, version, inputs, build, filters)
+
+        render.depends_on = tuple(depends_on)
+        return render
+
+    return decorator
+
+
+def chart(depends_on=FILTER_FIELDS):
+    # Fragmento que devolve uma figura Plotly: o JSON também vai para o cache
+    # em disco, reaproveitado por todos os processos do servidor
+    return fragment(depends_on, figure=True)
@@ -0,0 +1,77 @@
+import math
+
+import numpy as np
+import pandas as pd
+import plotly.express as px
+
+
+# Binning feito no servidor: a figura leva só as contagens por faixa,
+# e não a coluna inteira, então o payload não cresce com o número de linhas
+
+
+def nice_bin_size(lo, hi, nbins=10):
+    # Mesmo critério do auto-bin do Plotly: menor 1/2/5 × 10^k que cubra o intervalo
+    rough = (hi - lo) / nbins
+    if rough <= 0:
+        return 1.0
+    base = 10 ** math.floor(math.log10(rough))
+    for step in (1, 2, 5, 10):
+        if step * base >= rough:
+            return step * base
+    return 10 * base
+
+
+def bin_edges(values, nbins=10):
+    lo, hi = float(np.min(values)), float(np.max(values))
+    size = nice_bin_size(lo, hi, nbins)
+    start = math.floor(lo / size) * size
+    n = max(1, math.floor((hi - start) / size) + 1)
+    return start + size * np.arange(n + 1)
+
+
+def histogram_frame(values, weights=None, nbins=10, groups=None):
+    # Contagens por faixa (e por grupo, para histogramas empilhados) em formato longo
+    values = np.asarray(values, dtype=float)
+    if len(values) == 0:
+        return pd.DataFrame(columns=["bin_start", "bin_end", "bin_center", "group", "count"])
+    edges = bin_edges(values, nbins)
+    weights = np.ones(len(values)) if weights is None else np.asarray(weights, dtype=float)
+    bins = np.clip(np.searchsorted(edges, values, side="right") - 1, 0, len(edges) - 2)
+
+    if groups is None:
+        groups = np.zeros(len(values), dtype=int)
+    groups = np.asarray(groups)
+    group_values, group_codes = np.unique(groups, return_inverse=True)
+    counts = np.zeros((len(group_values), len(edges) - 1))
+    np.add.at(counts, (group_codes, bins), weights)
+
+    group_idx, bin_idx = np.nonzero(counts)
+    return pd.DataFrame({
+        "bin_start": edges[bin_idx],
+        "bin_end": edges[bin_idx + 1],
+        "bin_center": (edges[bin_idx] + edges[bin_idx + 1]) / 2,
+        "group": group_values[group_idx],
+        # Pesos fracionários (ex.: fatores de expansão da amostra) são
+        # arredondados; astype(int) truncaria 2.9999 para 2
+        "count": np.rint(counts[group_idx, bin_idx]).astype(int),
+    })
+
+
+def histogram_bars(frame, x_label, color=None, **kwargs):
+    # Desenha as faixas como barras coladas, com a mesma aparência do px.histogram
+    fig = px.bar(
+        frame,
+        x="bin_center",
+        y="count",
+        color=color,
+        custom_data=["bin_start", "bin_end"],
+        labels={"bin_center": x_label, "count": "count", **kwargs.pop("labels", {})},
+        **kwargs,
+    )
+    if not frame.empty:
+        fig.update_traces(width=float(frame["bin_end"].iloc[0] - frame["bin_start"].iloc[0]))
+    fig.update_traces(
+        hovertemplate=f"{x_label}=%{{customdata[0]:,}} - %{{customdata[1]:,}}<br>count=%{{y}}<extra></extra>"
+    )
+    fig.update_layout(bargap=0, barmode="relative")
+    return fig
@@ -0,0 +1,106 @@
+import argparse
+import logging
+import statistics
+import subprocess
+import sys
+
+
+# Orçamento de tempo de importação do dashboard: mede, com `python -X
+# importtime` num processo novo, o que um worker recém-criado importa antes de
+# servir a primeira página, e falha se passar do limite ou se algum módulo
+# que deveria ser importado só sob demanda aparecer. O limite é relativo a
+# `import pandas` medido da mesma forma (alternando as medições), para não
+# depender da velocidade da máquina.
+MODULES = ["livraria.data", "livraria.ui", "livraria.fragments", "plotly.express"]
+BASELINE = ["pandas"]
+# Importar o dashboard (pandas incluído) pode custar até isso vezes o pandas
+IMPORT_BUDGET_RATIO = 2.5
+# Não usados no caminho da primeira página: backends, ETL, recursos opcionais
+# (snapshots, modo aproximado, página de livros, registro de uso), o leitor de
+# Parquet (só na primeira leitura de um mart) e matplotlib (só no start.ipynb)
+FORBIDDEN = [
+    "matplotlib", "pyarrow.parquet", "livraria.sql_backend", "livraria.etl", "livraria.snapshots",
+    "livraria.sampling", "livraria.books", "livraria.usage",
+]
+
+logger = logging.getLogger(__name__)
+
+
+def parse_importtime(stderr):
+    # Linhas "import time: self [us] | cumulative | módulo", com o módulo
+    # indentado conforme a profundidade; as de nível zero somam o total
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append({
+            "module": name.strip(),
+            "self_ms": int(self_us) / 1000,
+            "cumulative_ms": int(cumulative_us) / 1000,
+            "depth": depth,
+        })
+    return rows
+
+
+def measure(modules=MODULES):
+    code = "; ".join(f"import {name}" for name in modules)
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code], capture_output=True, text=True, check=True,
+    )
+    rows = parse_importtime(result.stderr)
+    # site e afins são importados antes de qualquer código do app
+    total = sum(row["cumulative_ms"] for row in rows if row["depth"] == 0 and row["module"] in modules)
+    return total, rows
+
+
+def check(modules=MODULES, budget_ratio=IMPORT_BUDGET_RATIO, repeat=3, forbidden=FORBIDDEN, baseline=BASELINE):
+    runs, baselines = [], []
+    for _ in range(repeat):
+        runs.append(measure(modules))
+        baselines.append(measure(baseline)[0])
+    total = statistics.median(run[0] for run in runs)
+    baseline_ms = statistics.median(baselines)
+    ratio = statistics.median(run[0] / base for run, base in zip(runs, baselines))
+    rows = runs[-1][1]
+    imported = {row["module"] for row in rows}
+    unexpected = sorted(
+        name for name in imported if any(name == f or name.startswith(f"{f}.") for f in forbidden)
+    )
+    return {
+        "total_ms": total,
+        "baseline_ms": baseline_ms,
+        "ratio": ratio,
+        "budget_ratio": budget_ratio,
+        "unexpected": unexpected,
+        "heaviest": sorted(
+            (row for row in rows if row["depth"] <= 1), key=lambda row: row["cumulative_ms"], reverse=True,
+        )[:10],
+        "ok": ratio <= budget_ratio and not unexpected,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Confere o orçamento de tempo de importação do dashboard")
+    parser.add_argument("--budget-ratio", type=float, default=IMPORT_BUDGET_RATIO,
+                        help="Tempo máximo em relação a `import pandas`")
+    parser.add_argument("--repeat", type=int, default=3, help="Medições em processos novos (mediana)")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    report = check(budget_ratio=args.budget_ratio, repeat=args.repeat)
+    for row in report["heaviest"]:
+        logger.info("%9.1f ms  %s%s", row["cumulative_ms"], "  " * row["depth"], row["module"])
+    logger.info(
+        "Importação: %.0f ms, %.2fx o pandas (%.0f ms; orçamento %.2fx)",
+        report["total_ms"], report["ratio"], report["baseline_ms"], report["budget_ratio"],
+    )
+    if report["unexpected"]:
+        logger.error("Módulos importados fora de hora: %s", ", ".join(report["unexpected"]))
+    if not report["ok"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
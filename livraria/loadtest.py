@@ -0,0 +1,248 @@
+import argparse
+import json
+import logging
+import random
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from unittest.mock import MagicMock
+from urllib import parse
+
+import numpy as np
+import pandas as pd
+from streamlit.runtime import Runtime
+from streamlit.runtime.caching.storage.dummy_cache_storage import MemoryCacheStorageManager
+from streamlit.runtime.media_file_manager import MediaFileManager
+from streamlit.runtime.memory_media_file_storage import MemoryMediaFileStorage
+from streamlit.runtime.pages_manager import PagesManager
+from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+from streamlit.testing.v1 import AppTest
+from streamlit.testing.v1.local_script_runner import LocalScriptRunner
+from streamlit.testing.v1.util import patch_config_options
+
+from livraria.filters import DISCOUNT_OPTIONS
+
+
+# Teste de carga local: várias sessões simuladas (AppTest) rodam o dashboard
+# ao mesmo tempo no mesmo processo, compartilhando os caches como num servidor,
+# e repetem interações aleatórias da sidebar. Cada rerun é cronometrado.
+APP = "streamlit_app.py"
+PAGES = ["Geral.py", "Avaliações.py", "Livros.py"]
+# Páginas sem a sidebar de filtros: as interações viram busca/troca de livro
+BOOK_PAGES = {"Livros.py"}
+ACTIONS = {"genres": 0.35, "price": 0.35, "discount": 0.15, "page": 0.15}
+RESULTS_DIR = "benchmark_results"
+
+logger = logging.getLogger(__name__)
+
+
+class ConcurrentAppTest(AppTest):
+    # AppTest._run instala e remove um Runtime simulado global a cada rerun, o
+    # que derruba as outras sessões em paralelo. Aqui o Runtime é instalado uma
+    # vez para o teste inteiro (shared_runtime) e cada rerun só roda o script.
+    # Espelha o AppTest._run do streamlit==1.46.1 (sem suporte a secrets).
+    # O bytecode das páginas vem de um ScriptCache único, como no servidor: o
+    # ast.parse do Python 3.11 não é seguro com compilações simultâneas.
+    script_cache = ScriptCache()
+
+    def _run(self, widget_state=None, timeout=None):
+        pages_manager = PagesManager(self._script_path, self.script_cache, setup_watcher=False)
+        script_runner = LocalScriptRunner(
+            self._script_path, self.session_state, pages_manager, args=self.args, kwargs=self.kwargs,
+        )
+        script_runner._script_cache = self.script_cache
+        self._tree = script_runner.run(
+            widget_state, self.query_params, timeout or self.default_timeout, self._page_hash,
+        )
+        self._tree._runner = self
+        query_string = script_runner.event_data[-1]["client_state"].query_string
+        self.query_params = parse.parse_qs(query_string)
+        return self
+
+
+@contextmanager
+def shared_runtime():
+    runtime = MagicMock(spec=Runtime)
+    runtime.media_file_mgr = MediaFileManager(MemoryMediaFileStorage("/mock/media"))
+    runtime.cache_storage_manager = MemoryCacheStorageManager()
+    Runtime._instance = runtime
+    try:
+        with patch_config_options({"global.appTest": True}):
+            yield runtime
+    finally:
+        Runtime._instance = None
+
+
+def _random_genres(rng, at):
+    pills = at.sidebar.button_group[0]
+    options = [option.content for option in pills.options]
+    pills.set_value(rng.sample(options, rng.randint(1, len(options))))
+
+
+def _random_price(rng, at):
+    slider = at.sidebar.slider[0]
+    lo, hi = sorted(round(rng.uniform(slider.min, slider.max), 2) for _ in range(2))
+    # Faixa de pelo menos um passo, sem passar do máximo do slider
+    hi = min(max(hi, lo + slider.step), slider.max)
+    lo = max(min(lo, hi - slider.step), slider.min)
+    slider.set_value((round(lo, 2), round(hi, 2)))
+
+
+def _random_discount(rng, at):
+    at.sidebar.radio[0].set_value(rng.choice(DISCOUNT_OPTIONS))
+
+
+def _random_book(rng, at):
+    # Livros.py: busca o título de um dos livros listados (abre esse livro) ou
+    # o prefixo de uma das suas palavras; sem resultados, volta à busca vazia
+    label = rng.choice(at.selectbox[0].options) if at.selectbox else ""
+    title = label.split(" — ")[0]
+    if rng.random() < 0.5:
+        at.text_input[0].input(title)
+        return
+    words = title.split() or [""]
+    word = rng.choice(words)
+    at.text_input[0].input(word[:rng.randint(1, max(len(word), 1))])
+
+
+def run_session(session, app, interactions, seed, timeout):
+    rng = random.Random(seed + session)
+    samples = []
+    page = PAGES[0]
+
+    def rerun(action):
+        start = time.perf_counter()
+        at.run(timeout=timeout)
+        samples.append({
+            "session": session,
+            "page": page,
+            "action": action,
+            "seconds": time.perf_counter() - start,
+            "errors": len(at.exception),
+        })
+
+    at = ConcurrentAppTest(app, default_timeout=timeout)
+    rerun("initial")
+    for _ in range(interactions):
+        action = rng.choices(list(ACTIONS), weights=list(ACTIONS.values()))[0]
+        if action == "discount" and not at.sidebar.radio:
+            action = "price"  # Avaliações.py não tem filtro de desconto
+        if action != "page" and page in BOOK_PAGES:
+            action = "book"
+        if at.exception:
+            action = "retry"  # rerun com erro não desenha a sidebar: só repete
+        if action == "retry":
+            pass
+        elif action == "page":
+            page = rng.choice([other for other in PAGES if other != page])
+            at.switch_page(page)
+        elif action == "genres":
+            _random_genres(rng, at)
+        elif action == "price":
+            _random_price(rng, at)
+        elif action == "book":
+            _random_book(rng, at)
+        else:
+            _random_discount(rng, at)
+        rerun(action)
+    return samples
+
+
+def cache_stats():
+    # Caches compartilhados pelas sessões (recursos do processo)
+    from livraria.data import BACKEND, get_filter_cache
+    from livraria.fragments import fragment_stats, get_figure_cache
+
+    stats = {"fragments": fragment_stats(), "figures": get_figure_cache().stats()}
+    if BACKEND != "sqlite":
+        stats["filters"] = get_filter_cache().stats()
+    for cache in stats.values():
+        lookups = cache["hits"] + cache["misses"]
+        cache["hit_rate"] = cache["hits"] / lookups if lookups else None
+    return stats
+
+
+def summarize(samples, wall_seconds):
+    frame = pd.DataFrame(samples)
+
+    def latency(group):
+        seconds = group["seconds"].to_numpy()
+        return {
+            "reruns": len(seconds),
+            "p50_ms": float(np.percentile(seconds, 50) * 1000),
+            "p95_ms": float(np.percentile(seconds, 95) * 1000),
+            "p99_ms": float(np.percentile(seconds, 99) * 1000),
+            "max_ms": float(seconds.max() * 1000),
+        }
+
+    return {
+        "reruns": len(frame),
+        "errors": int(frame["errors"].sum()),
+        "wall_seconds": wall_seconds,
+        "throughput_rps": len(frame) / wall_seconds,
+        "latency": latency(frame),
+        "by_action": {action: latency(group) for action, group in frame.groupby("action")},
+        "by_page": {page: latency(group) for page, group in frame.groupby("page")},
+    }
+
+
+def run_load_test(app=APP, sessions=8, interactions=20, seed=0, timeout=120):
+    app = str(Path(app).resolve())
+    # As páginas importam o pacote livraria, ao lado do app
+    sys.path.insert(0, str(Path(app).parent))
+
+    start = time.perf_counter()
+    with shared_runtime(), ThreadPoolExecutor(max_workers=sessions) as pool:
+        futures = [pool.submit(run_session, s, app, interactions, seed, timeout) for s in range(sessions)]
+        samples = [sample for future in futures for sample in future.result()]
+    wall_seconds = time.perf_counter() - start
+
+    summary = summarize(samples, wall_seconds)
+    summary["caches"] = cache_stats()
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Teste de carga local do dashboard com sessões AppTest concorrentes")
+    parser.add_argument("--app", default=APP)
+    parser.add_argument("--sessions", type=int, default=8, help="Sessões simuladas em paralelo")
+    parser.add_argument("--interactions", type=int, default=20, help="Interações por sessão")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--timeout", type=float, default=120, help="Tempo máximo de cada rerun (s)")
+    parser.add_argument("--output", help=f"Arquivo JSON de resultados (padrão: {RESULTS_DIR}/loadtest-<data>.json)")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    started = datetime.now(timezone.utc)
+    summary = run_load_test(args.app, args.sessions, args.interactions, args.seed, args.timeout)
+    results = {
+        "meta": {
+            "started_at": started.isoformat(timespec="seconds"),
+            "sessions": args.sessions,
+            "interactions": args.interactions,
+            "seed": args.seed,
+        },
+        "summary": summary,
+    }
+
+    output = Path(args.output or Path(RESULTS_DIR) / f"loadtest-{started:%Y%m%dT%H%M%SZ}.json")
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(results, indent=2))
+
+    latency = summary["latency"]
+    logger.info(
+        "%d reruns em %.1fs (%.1f/s), p50 %.0f ms, p95 %.0f ms, %d erros",
+        summary["reruns"], summary["wall_seconds"], summary["throughput_rps"],
+        latency["p50_ms"], latency["p95_ms"], summary["errors"],
+    )
+    for name, cache in summary["caches"].items():
+        if cache["hit_rate"] is not None:
+            logger.info("cache %-9s hit rate %.1f%%", name, cache["hit_rate"] * 100)
+    logger.info("Resultados gravados em %s", output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+import threading
+from collections import OrderedDict
+from functools import update_wrapper
+
+
+class Memo:
+    # Cache LRU de uma função de montagem (marts, cubo, índices), por
+    # argumentos, para o processo inteiro. Não depende do contexto de execução
+    # do Streamlit, então as sessões e as threads de aquecimento leem as mesmas
+    # entradas. Cada chave é montada uma vez: quem pede a mesma chave durante a
+    # montagem espera o resultado em vez de montar de novo.
+
+    def __init__(self, build, max_entries=None):
+        self.build = build
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._building = {}
+        self._lock = threading.Lock()
+        update_wrapper(self, build)
+
+    def __call__(self, *args):
+        # Listas (ex.: projeções de colunas) entram na chave como tuplas
+        args = tuple(tuple(arg) if isinstance(arg, list) else arg for arg in args)
+        while True:
+            with self._lock:
+                if args in self._entries:
+                    self._entries.move_to_end(args)
+                    self.hits += 1
+                    return self._entries[args]
+                building = self._building.get(args)
+                if building is None:
+                    building = self._building[args] = threading.Event()
+                    self.misses += 1
+                    break
+            # Outra thread está montando a mesma chave; se ela falhar, esta tenta de novo
+            building.wait()
+
+        try:
+            value = self.build(*args)
+            with self._lock:
+                self._entries[args] = value
+                while self.max_entries is not None and len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+            return value
+        finally:
+            with self._lock:
+                del self._building[args]
+            building.set()
+
+    def discard(self, predicate):
+        # Remove as entradas cujos argumentos satisfazem predicate(*args)
+        # (ex.: tudo o que foi montado a partir de um snapshot liberado)
+        with self._lock:
+            for args in [args for args in self._entries if predicate(*args)]:
+                del self._entries[args]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+def memo(max_entries=None):
+    return lambda build: Memo(build, max_entries)
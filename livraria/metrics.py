@@ -0,0 +1,227 @@
+import atexit
+import logging
+import os
+import resource
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager, nullcontext
+from functools import wraps
+from pathlib import Path
+
+from livraria.storage import CACHE_DIR_NAME, _write_atomic
+
+
+# Instrumentação do caminho quente (carga, filtros, montagem e envio dos
+# gráficos), ligada com LIVRARIA_METRICS=1. Desligada, os decoradores devolvem
+# a própria função e os blocos medidos usam um contexto vazio compartilhado.
+# Ligada, uma thread grava os totais a cada intervalo num arquivo no formato
+# texto do Prometheus (um por processo, para o textfile collector do
+# node_exporter), apagado quando o processo termina.
+ENABLED = os.environ.get("LIVRARIA_METRICS") == "1"
+METRICS_INTERVAL = float(os.environ.get("LIVRARIA_METRICS_INTERVAL", 30))
+METRICS_THREAD = "livraria-metrics"
+# Últimas medições guardadas por nome, para os percentis do painel e do arquivo
+WINDOW = 512
+
+logger = logging.getLogger(__name__)
+_NULL = nullcontext()
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def metrics_dir():
+    return Path(os.environ.get("LIVRARIA_METRICS_DIR", Path(CACHE_DIR_NAME) / "metrics"))
+
+
+def rss_bytes():
+    # Memória residente atual; sem /proc, cai para o pico do processo
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class Metric:
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.max_seconds = 0.0
+        self.rss_delta = 0
+        self.payload_bytes = None
+        self.recent = deque(maxlen=WINDOW)
+
+    def add(self, seconds, rss_delta):
+        self.count += 1
+        self.seconds += seconds
+        self.max_seconds = max(self.max_seconds, seconds)
+        self.rss_delta += rss_delta
+        self.recent.append(seconds)
+
+    def summary(self):
+        import numpy as np
+
+        recent = np.fromiter(self.recent, dtype="float64")
+        p50, p95 = np.percentile(recent, [50, 95]) if len(recent) else (0.0, 0.0)
+        return {
+            "count": self.count,
+            "seconds": self.seconds,
+            "mean_ms": self.seconds / self.count * 1000 if self.count else 0.0,
+            "p50_ms": float(p50) * 1000,
+            "p95_ms": float(p95) * 1000,
+            "max_ms": self.max_seconds * 1000,
+            "rss_delta_mb": self.rss_delta / 2**20,
+            "payload_kb": None if self.payload_bytes is None else self.payload_bytes / 1024,
+        }
+
+
+class Registry:
+    # Medições do processo, compartilhadas por todas as sessões
+
+    def __init__(self, path=None, interval=METRICS_INTERVAL):
+        self.path = Path(path) if path is not None else metrics_dir() / f"livraria-{os.getpid()}.prom"
+        self.interval = interval
+        self.metrics = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=METRICS_THREAD, daemon=True)
+
+    def start(self):
+        # O arquivo é gravado mesmo sem medições novas (o RSS do processo muda)
+        # e removido na saída, para o coletor não exportar um processo encerrado
+        self._thread.start()
+        atexit.register(self.close)
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join()
+
+    def close(self):
+        self.stop()
+        self.path.unlink(missing_ok=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.write()
+            except OSError:
+                logger.exception("Falha ao gravar as métricas em %s", self.path)
+
+    def _metric(self, name):
+        metric = self.metrics.get(name)
+        if metric is None:
+            metric = self.metrics[name] = Metric()
+        return metric
+
+    def record(self, name, seconds, rss_delta=0, payload_bytes=None):
+        with self._lock:
+            metric = self._metric(name)
+            metric.add(seconds, rss_delta)
+            if payload_bytes is not None:
+                metric.payload_bytes = payload_bytes
+
+    @contextmanager
+    def timed(self, name):
+        rss = rss_bytes()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start, rss_bytes() - rss)
+
+    def snapshot(self):
+        with self._lock:
+            return {name: metric.summary() for name, metric in sorted(self.metrics.items())}
+
+    def prometheus(self):
+        pid = os.getpid()
+        lines = [
+            "# HELP livraria_duration_seconds Tempo das etapas do rerun do dashboard",
+            "# TYPE livraria_duration_seconds summary",
+        ]
+        snapshot = self.snapshot()
+        for name, m in snapshot.items():
+            labels = f'name="{name}",pid="{pid}"'
+            lines.append(f'livraria_duration_seconds{{{labels},quantile="0.5"}} {m["p50_ms"] / 1000:.6f}')
+            lines.append(f'livraria_duration_seconds{{{labels},quantile="0.95"}} {m["p95_ms"] / 1000:.6f}')
+            lines.append(f"livraria_duration_seconds_sum{{{labels}}} {m['seconds']:.6f}")
+            lines.append(f"livraria_duration_seconds_count{{{labels}}} {m['count']}")
+        lines += [
+            "# HELP livraria_duration_max_seconds Maior tempo observado por etapa",
+            "# TYPE livraria_duration_max_seconds gauge",
+        ]
+        lines += [
+            f'livraria_duration_max_seconds{{name="{name}",pid="{pid}"}} {m["max_ms"] / 1000:.6f}'
+            for name, m in snapshot.items()
+        ]
+        lines += [
+            "# HELP livraria_rss_delta_bytes_total Variação acumulada da memória residente durante cada etapa",
+            "# TYPE livraria_rss_delta_bytes_total counter",
+        ]
+        lines += [
+            f'livraria_rss_delta_bytes_total{{name="{name}",pid="{pid}"}} {int(m["rss_delta_mb"] * 2**20)}'
+            for name, m in snapshot.items()
+        ]
+        lines += [
+            "# HELP livraria_payload_bytes Tamanho do último JSON enviado por gráfico",
+            "# TYPE livraria_payload_bytes gauge",
+        ]
+        lines += [
+            f'livraria_payload_bytes{{name="{name}",pid="{pid}"}} {int(m["payload_kb"] * 1024)}'
+            for name, m in snapshot.items() if m["payload_kb"] is not None
+        ]
+        lines += [
+            "# HELP livraria_process_rss_bytes Memória residente do processo",
+            "# TYPE livraria_process_rss_bytes gauge",
+            f'livraria_process_rss_bytes{{pid="{pid}"}} {rss_bytes()}',
+        ]
+        return "\n".join(lines) + "\n"
+
+    def write(self):
+        text = self.prometheus()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        _write_atomic(self.path, lambda p: p.write_text(text))
+        return self.path
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_registry():
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = Registry().start()
+        return _registry
+
+
+def timed(name):
+    # Bloco medido: `with timed("etapa"): ...`
+    if not ENABLED:
+        return _NULL
+    return get_registry().timed(name)
+
+
+def instrumented(name):
+    # Decorador de função medida; desligado, não envolve a função
+    def decorator(fn):
+        if not ENABLED:
+            return fn
+
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            with get_registry().timed(name):
+                return fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def record_payload(name, seconds, payload_bytes):
+    if ENABLED:
+        get_registry().record(name, seconds, payload_bytes=payload_bytes)
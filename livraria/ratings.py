@@ -0,0 +1,83 @@
+from pathlib import Path
+
+import pandas as pd
+
+from livraria.storage import dataset_version, read_mart
+
+
+# Mart de avaliações em esquema estrela: fatos por edição + histograma de
+# estrelas por livro, no lugar de uma linha por avaliação × edição
+EDITIONS_MART = "book_editions.csv"
+RATING_HIST_MART = "book_rating_hist.csv"
+
+STARS = [1, 2, 3, 4, 5]
+HIST_COLUMNS = [f"rating_{star}" for star in STARS]
+FACT_COLUMNS = ["title", "rating", "publication_date", "pages", "price", "format_desc", "genre_desc", "n"]
+
+
+def build_rating_histograms(ratings):
+    hist = ratings.groupby(["book_id", "rating"]).size().unstack(fill_value=0)
+    hist = hist.reindex(columns=STARS, fill_value=0)
+    hist.columns = HIST_COLUMNS
+    return hist.reset_index()
+
+
+def rating_facts(editions, hist):
+    # Uma linha por edição × estrela, com n = quantidade de avaliações do livro
+    # naquela estrela. Agregações ponderadas por n reproduzem exatamente as da
+    # tabela explodida (uma linha por avaliação × edição).
+    stars = hist.melt(id_vars="book_id", value_vars=HIST_COLUMNS, var_name="rating", value_name="n")
+    stars["rating"] = stars["rating"].str.removeprefix("rating_").astype(int)
+    stars = stars[stars["n"] > 0]
+    facts = pd.merge(editions, stars, how="inner", on="book_id")
+    return facts[FACT_COLUMNS].reset_index(drop=True)
+
+
+def editions_path(hist_path):
+    return Path(hist_path).with_name(EDITIONS_MART)
+
+
+def read_rating_facts(hist_path):
+    return rating_facts(read_mart(editions_path(hist_path)), read_mart(hist_path))
+
+
+def rating_facts_version(hist_path):
+    return dataset_version(hist_path) + dataset_version(editions_path(hist_path))
+
+
+def _price(facts):
+    # Preço ao centavo, em float64, para as médias ponderadas
+    return facts["price"].astype("float64").round(2)
+
+
+def totals(facts):
+    n = facts["n"].sum()
+    if n == 0:
+        return {"reviews": 0, "avg_rating": 0.0, "avg_price": 0.0, "satisfaction": 0.0}
+    return {
+        "reviews": int(n),
+        "avg_rating": (facts["rating"].astype("int64") * facts["n"]).sum() / n,
+        "avg_price": (_price(facts) * facts["n"]).sum() / n,
+        "satisfaction": facts.loc[facts["rating"] >= 4, "n"].sum() / n,
+    }
+
+
+def _weighted_by(facts, key):
+    weighted = pd.DataFrame({
+        key: facts[key],
+        "n": facts["n"].astype("int64"),
+        "rating_sum": facts["rating"].astype("int64") * facts["n"],
+        "price_sum": _price(facts) * facts["n"],
+    })
+    summary = weighted.groupby(key, observed=True).sum()
+    summary["avg_rating"] = summary["rating_sum"] / summary["n"]
+    summary["avg_price"] = summary["price_sum"] / summary["n"]
+    return summary
+
+
+def by_rating(facts):
+    return _weighted_by(facts, "rating")
+
+
+def by_genre(facts):
+    return _weighted_by(facts, "genre_desc")
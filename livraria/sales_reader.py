@@ -0,0 +1,91 @@
+import logging
+from pathlib import Path
+
+import pandas as pd
+
+
+SALES_COLUMNS = ["sale_date", "isbn", "discount", "item_id", "order_id"]
+KEY_COLUMNS = ["isbn", "item_id", "order_id"]
+DATE_FORMAT = "%d/%m/%Y"
+
+# Linha corrompida: o registro inteiro vem entre aspas no primeiro campo e o
+# desconto decimal foi escrito com vírgula, ex.: 2/1/2193,989-28-...,"0,15",107020-1-1485,107020-13
+MALFORMED_ROW = r'^(?P<sale_date>[^,]*),(?P<isbn>[^,]*),"?(?P<discount>[^"]*?)"?,(?P<item_id>[^,]*),(?P<order_id>[^,]*)$'
+# Linhas sem data válida ou ISBN mesmo depois da correção são descartadas (e
+# contadas); acima desta fração das linhas lidas (e de algumas linhas soltas,
+# para cargas incrementais pequenas) o arquivo mudou de formato e a leitura
+# falha em vez de perder vendas em silêncio
+MAX_INVALID_FRACTION = 0.01
+MIN_INVALID_ROWS = 10
+
+logger = logging.getLogger(__name__)
+
+
+class SalesReader:
+    # Lê sales.csv em blocos de tamanho fixo, corrigindo as linhas com desconto
+    # decimal em vírgula numa única passada e entregando blocos já tipados
+
+    def __init__(self, path, chunksize=100_000, offset=0, max_invalid_fraction=MAX_INVALID_FRACTION):
+        self.path = Path(path)
+        self.chunksize = chunksize
+        self.offset = offset
+        self.max_invalid_fraction = max_invalid_fraction
+        self.end_offset = offset
+        self.rows = 0
+        self.repaired_rows = 0
+        self.invalid_rows = 0
+
+    def __iter__(self):
+        with open(self.path, "rb") as f:
+            f.seek(self.offset)
+            reader = pd.read_csv(
+                f,
+                names=SALES_COLUMNS,
+                header=0 if self.offset == 0 else None,
+                usecols=range(len(SALES_COLUMNS)),
+                dtype=str,
+                chunksize=self.chunksize,
+            )
+            with reader:
+                for chunk in reader:
+                    yield self._typed(self._repair(chunk))
+            self.end_offset = f.tell()
+
+    def empty_chunk(self):
+        return self._typed(pd.DataFrame({col: pd.Series(dtype=str) for col in SALES_COLUMNS}))
+
+    def _repair(self, chunk):
+        original = chunk["sale_date"]
+        malformed = original.str.contains(",", regex=False, na=False)
+        if malformed.any():
+            fixed = original[malformed].str.extract(MALFORMED_ROW)
+            fixed["discount"] = fixed["discount"].str.replace(",", ".", regex=False)
+            chunk.loc[malformed, SALES_COLUMNS] = fixed[SALES_COLUMNS]
+
+        # Datas fora do formato contam como linha inválida, não como erro de leitura
+        chunk["sale_date"] = pd.to_datetime(chunk["sale_date"], format=DATE_FORMAT, errors="coerce")
+        invalid = chunk["sale_date"].isna() | chunk["isbn"].isna()
+        n_invalid = int(invalid.sum())
+        self.rows += len(chunk)
+        self.repaired_rows += int((malformed & ~invalid).sum())
+        if n_invalid:
+            self.invalid_rows += n_invalid
+            first = chunk.loc[invalid].iloc[0]
+            example = ",".join("" if pd.isna(v) else str(v) for v in [original[first.name], *first[SALES_COLUMNS[1:]]])
+            logger.warning("%d linhas de vendas sem data válida ou ISBN descartadas (ex.: %r)", n_invalid, example)
+            if self.invalid_rows > max(MIN_INVALID_ROWS, self.max_invalid_fraction * self.rows):
+                raise ValueError(
+                    f"{self.invalid_rows} de {self.rows} linhas de {self.path} não puderam ser lidas "
+                    f"(limite {self.max_invalid_fraction:.0%})"
+                )
+            chunk = chunk[~invalid]
+        return chunk
+
+    def _typed(self, chunk):
+        chunk["sale_date"] = pd.to_datetime(chunk["sale_date"], format=DATE_FORMAT)
+        chunk["discount"] = chunk["discount"].astype(float)
+        return chunk.reset_index(drop=True)
+
+
+def read_sales(path, chunksize=100_000, offset=0, max_invalid_fraction=MAX_INVALID_FRACTION):
+    return SalesReader(path, chunksize=chunksize, offset=offset, max_invalid_fraction=max_invalid_fraction)
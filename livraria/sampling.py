@@ -0,0 +1,135 @@
+import numpy as np
+import pandas as pd
+
+from livraria.cube import CUBE_DIMENSIONS, slice_cube
+from livraria.dates import lookup
+from livraria.storage import _write_atomic
+
+
+# Amostra estratificada por gênero do mart de vendas, mantida pelo ETL ao lado
+# do df.csv. Cada venda recebe uma chave aleatória e cada gênero guarda as k
+# menores (reservatório bottom-k): blocos novos e cargas incrementais só
+# disputam as vagas com a amostra atual. Cada linha leva o total do seu
+# estrato (e os preços extremos), de onde saem os pesos N/n das estimativas.
+SAMPLE_MART = "df_sample.csv"
+SAMPLE_ROWS_PER_GENRE = 5_000
+SAMPLE_COLUMNS = ["genre_desc", "price", "discount", "total_discount", "date_id", "order_id"]
+STRATUM_COLUMNS = ["stratum_rows", "stratum_min_price", "stratum_max_price"]
+# Quantil da normal para intervalos de 95%
+Z_95 = 1.959964
+
+
+def empty_sample():
+    return pd.DataFrame(columns=[*SAMPLE_COLUMNS, "sample_key", *STRATUM_COLUMNS])
+
+
+def read_sample(path):
+    try:
+        return pd.read_csv(path)
+    except FileNotFoundError:
+        return None
+
+
+def write_sample(sample, path):
+    _write_atomic(path, lambda p: sample.to_csv(p, index=False))
+
+
+def _strata(sample):
+    return sample.groupby("genre_desc")[STRATUM_COLUMNS].first()
+
+
+def update_sample(sample, rows, rng, per_stratum=SAMPLE_ROWS_PER_GENRE):
+    # rows: vendas novas (uma linha por pedido, como o dashboard as conta)
+    if rows.empty:
+        return sample
+    rows = rows[SAMPLE_COLUMNS].assign(sample_key=rng.random(len(rows)))
+
+    price = rows["price"].astype("float64").round(2)
+    new = price.groupby(rows["genre_desc"]).agg(["size", "min", "max"])
+    new.columns = STRATUM_COLUMNS
+    if not sample.empty:
+        new = pd.concat([_strata(sample), new]).groupby(level=0).agg(
+            {"stratum_rows": "sum", "stratum_min_price": "min", "stratum_max_price": "max"}
+        )
+
+    frames = [rows] if sample.empty else [sample.drop(columns=STRATUM_COLUMNS), rows]
+    combined = pd.concat(frames, ignore_index=True).sort_values("sample_key", kind="stable")
+    combined = combined.groupby("genre_desc", sort=False).head(per_stratum).reset_index(drop=True)
+    return combined.join(new, on="genre_desc")
+
+
+def sample_facts(sample, date_dim):
+    # Linhas da amostra com o peso de cada uma (vendas do estrato / linhas amostradas)
+    sampled = sample.groupby("genre_desc")["genre_desc"].transform("size")
+    return pd.DataFrame({
+        "genre_desc": sample["genre_desc"],
+        "month": lookup(date_dim, sample["date_id"], "month"),
+        "price": sample["price"].astype("float64").round(2),
+        "discounted": sample["discount"].fillna(0) > 0,
+        "total_discount": sample["total_discount"].astype("float64").round(4),
+        "weight": sample["stratum_rows"] / sampled,
+        "stratum_rows": sample["stratum_rows"],
+        "stratum_sampled": sampled,
+    })
+
+
+def sample_options(sample):
+    # Opções da sidebar exatas a partir dos totais de cada estrato
+    strata = _strata(sample).sort_values("stratum_rows", ascending=False)
+    return (
+        strata.index.tolist(),
+        float(strata["stratum_min_price"].min()),
+        float(strata["stratum_max_price"].max()),
+    )
+
+
+def sample_cube(facts):
+    # Mesmo esquema do build_sales_cube, com somas ponderadas: as funções do
+    # cube (slice_cube, totals, by_genre, by_month) servem sem mudança
+    weighted = facts.assign(
+        revenue=facts["price"] * facts["weight"],
+        total_discount=facts["total_discount"] * facts["weight"],
+    )
+    return weighted.groupby(CUBE_DIMENSIONS, observed=True).agg(
+        count=("weight", "sum"),
+        revenue=("revenue", "sum"),
+        total_discount=("total_discount", "sum"),
+    ).reset_index()
+
+
+def estimate(facts, filters=None, by=None, z=Z_95):
+    # Estimador estratificado de vendas, receita e preço médio das linhas que
+    # passam no filtro, por domínio (`by`: gênero ou mês) ou no total, com a
+    # meia-largura do intervalo de confiança. O preço médio é um estimador de
+    # razão (receita / vendas), com variância pela linearização usual.
+    strata = facts.groupby("genre_desc", observed=True).agg(N=("stratum_rows", "first"), n=("stratum_sampled", "first"))
+    rows = facts if filters is None else slice_cube(facts, filters)
+    keys = ["genre_desc"] if by is None or by == "genre_desc" else ["genre_desc", by]
+    cells = rows.assign(price2=rows["price"] ** 2).groupby(keys, observed=True).agg(
+        k=("price", "size"), sy=("price", "sum"), syy=("price2", "sum"),
+    ).join(strata, on="genre_desc")
+
+    # Variância por estrato: N² (1 - n/N) s² / n, com s² sobre as n linhas amostradas
+    factor = cells["N"] ** 2 * (1 - cells["n"] / cells["N"]) / cells["n"]
+    dof = (cells["n"] - 1).clip(lower=1)
+    scale = cells["N"] / cells["n"]
+    cells["count"] = scale * cells["k"]
+    cells["revenue"] = scale * cells["sy"]
+    cells["count_var"] = factor * (cells["k"] - cells["k"] ** 2 / cells["n"]) / dof
+    cells["revenue_var"] = factor * (cells["syy"] - cells["sy"] ** 2 / cells["n"]) / dof
+
+    domain = np.zeros(len(cells), dtype=int) if by is None else cells.index.get_level_values(by)
+    out = cells[["count", "revenue", "count_var", "revenue_var"]].groupby(domain).sum()
+    out["avg_price"] = out["revenue"] / out["count"]
+
+    ratio = out["avg_price"].reindex(domain).to_numpy()
+    sz = cells["sy"] - ratio * cells["k"]
+    szz = cells["syy"] - 2 * ratio * cells["sy"] + ratio ** 2 * cells["k"]
+    cells["ratio_var"] = factor * (szz - sz ** 2 / cells["n"]) / dof
+    out["avg_price_var"] = cells["ratio_var"].groupby(domain).sum() / out["count"] ** 2
+
+    for name in ["count", "revenue", "avg_price"]:
+        out[f"{name}_ci"] = z * np.sqrt(out.pop(f"{name}_var").clip(lower=0))
+    if by is None:
+        out.index = ["total"]
+    return out[["count", "count_ci", "revenue", "revenue_ci", "avg_price", "avg_price_ci"]]
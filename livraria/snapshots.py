@@ -0,0 +1,140 @@
+import logging
+import shutil
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from livraria.storage import CACHE_DIR_NAME, _write_atomic
+
+
+# Snapshots versionados dos marts: cada build do ETL vai para <raiz>/<id>/ e
+# só fica visível quando termina, com a troca atômica do ponteiro CURRENT.
+# Um snapshot publicado nunca é alterado (a carga incremental parte de uma
+# cópia do atual), então quem ainda o lê não vê arquivos pela metade.
+CURRENT_FILE = "CURRENT"
+KEEP_SNAPSHOTS = 3
+WATCHER_THREAD = "livraria-snapshots"
+
+logger = logging.getLogger(__name__)
+
+
+def list_snapshots(root):
+    root = Path(root)
+    if not root.exists():
+        return []
+    return sorted(p for p in root.iterdir() if p.is_dir() and not p.name.startswith("."))
+
+
+def current_snapshot(root):
+    try:
+        name = (Path(root) / CURRENT_FILE).read_text().strip()
+    except FileNotFoundError:
+        return None
+    return Path(root) / name if name else None
+
+
+def create_snapshot(root, base=None):
+    # Diretório novo, ainda não publicado; `base` (snapshot anterior) é copiado
+    # para a carga incremental continuar de onde parou
+    root = Path(root)
+    snapshot = root / datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%fZ")
+    if base is None:
+        snapshot.mkdir(parents=True)
+    else:
+        shutil.copytree(base, snapshot, ignore=shutil.ignore_patterns(CACHE_DIR_NAME))
+    return snapshot
+
+
+def publish(root, snapshot):
+    _write_atomic(Path(root) / CURRENT_FILE, lambda p: p.write_text(Path(snapshot).name + "\n"))
+    logger.info("Snapshot publicado: %s", Path(snapshot).name)
+
+
+def prune(root, keep=KEEP_SNAPSHOTS):
+    # Remove os snapshots mais antigos, nunca o publicado
+    current = current_snapshot(root)
+    snapshots = [p for p in list_snapshots(root) if p != current]
+    for snapshot in snapshots[:max(0, len(snapshots) - (keep - 1))]:
+        shutil.rmtree(snapshot, ignore_errors=True)
+        logger.info("Snapshot removido: %s", snapshot.name)
+
+
+class SnapshotWatcher:
+    # Acompanha o ponteiro CURRENT numa thread: um snapshot novo é preparado
+    # (carregado, indexado, agregados pré-calculados) fora das requisições e
+    # só então vira o ativo. Cada execução do app fixa o snapshot ativo no
+    # início (pin) e o usa até o fim; um snapshot que nenhuma sessão fixou
+    # durante `grace` segundos é liberado.
+
+    def __init__(self, root, prepare, release=None, interval=5.0, grace=600.0):
+        self.root = Path(root)
+        self.prepare = prepare
+        self.release = release
+        self.interval = interval
+        self.grace = grace
+        self.current = current_snapshot(self.root)
+        self.swaps = 0
+        self._prepared = {self.current} if self.current is not None else set()
+        self._failed = None
+        self._pins = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=WATCHER_THREAD, daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def pin(self, session_id):
+        with self._lock:
+            snapshot = self.current
+            self._pins[session_id] = (snapshot, time.monotonic())
+            return snapshot
+
+    def poll(self):
+        published = current_snapshot(self.root)
+        if published is None or published == self.current or published == self._failed:
+            return False
+        start = time.perf_counter()
+        try:
+            self.prepare(published)
+        except Exception:
+            # Snapshot com problema: as sessões continuam no atual
+            logger.exception("Falha ao preparar o snapshot %s", published.name)
+            self._failed = published
+            return False
+        with self._lock:
+            self.current = published
+            self._prepared.add(published)
+            self.swaps += 1
+        logger.info("Snapshot %s ativo (preparado em %.1fs)", published.name, time.perf_counter() - start)
+        return True
+
+    def release_unused(self):
+        now = time.monotonic()
+        with self._lock:
+            self._pins = {s: pin for s, pin in self._pins.items() if now - pin[1] < self.grace}
+            in_use = {snapshot for snapshot, _ in self._pins.values()} | {self.current}
+            unused = self._prepared - in_use
+            self._prepared -= unused
+        for snapshot in unused:
+            if self.release is not None:
+                self.release(snapshot)
+            logger.info("Snapshot %s liberado", snapshot.name)
+        return unused
+
+    def _run(self):
+        if self.current is not None:
+            # O publicado na partida também é aquecido, sem bloquear a primeira sessão
+            try:
+                self.prepare(self.current)
+            except Exception:
+                logger.exception("Falha ao preparar o snapshot %s", self.current.name)
+        while not self._stop.wait(self.interval):
+            self.poll()
+            self.release_unused()
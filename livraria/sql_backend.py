@@ -0,0 +1,196 @@
+import os
+import sqlite3
+import threading
+from pathlib import Path
+
+import pandas as pd
+
+from livraria.dates import DATE_DIM_MART
+from livraria.ratings import EDITIONS_MART, HIST_COLUMNS, RATING_HIST_MART, STARS
+from livraria.storage import CATEGORY_COLUMNS, DATE_COLUMNS, apply_schema
+
+
+# Backend opcional: os marts ficam num banco SQLite local e filtros e
+# agregações viram consultas SQL, que devolvem só resultados agregados
+# (ou uma página de linhas). Nenhum processo precisa do mart inteiro em memória.
+SALES_TABLE = "sales"
+DATE_DIM_TABLE = "date_dim"
+EDITIONS_TABLE = "editions"
+RATING_HIST_TABLE = "rating_hist"
+RATING_FACTS_VIEW = "rating_facts"
+
+# Mart (nome do arquivo) -> tabela/visão no banco
+MART_TABLES = {
+    "df.csv": SALES_TABLE,
+    RATING_HIST_MART: RATING_FACTS_VIEW,
+}
+
+
+def _create_rating_facts_view(conn):
+    selects = [
+        f"SELECT e.title, {star} AS rating, e.publication_date, e.pages, e.price, e.format_desc, e.genre_desc, "
+        f"h.{column} AS n FROM {EDITIONS_TABLE} e JOIN {RATING_HIST_TABLE} h USING (book_id) WHERE h.{column} > 0"
+        for star, column in zip(STARS, HIST_COLUMNS)
+    ]
+    conn.execute(f"CREATE VIEW {RATING_FACTS_VIEW} AS " + " UNION ALL ".join(selects))
+
+
+def _insert_frame(conn, table, frame, ignore_duplicates=False):
+    frame = frame.astype(object).where(frame.notna(), None)
+    for col in frame.columns:
+        if col in DATE_COLUMNS:
+            frame[col] = frame[col].map(lambda d: d if d is None else str(d)[:10])
+    placeholders = ", ".join("?" * len(frame.columns))
+    verb = "INSERT OR IGNORE" if ignore_duplicates else "INSERT"
+    conn.executemany(f"{verb} INTO {table} VALUES ({placeholders})", frame.itertuples(index=False, name=None))
+
+
+def _create_table(conn, table, frame, constraints=""):
+    columns = ", ".join(f'"{col}"' for col in frame.columns)
+    conn.execute(f"CREATE TABLE {table} ({columns}{constraints})")
+
+
+def build_database(mart_dir, db_path, chunksize=100_000):
+    mart_dir, db_path = Path(mart_dir), Path(db_path)
+    tmp_path = db_path.with_name(f"{db_path.name}.{os.getpid()}.tmp")
+    tmp_path.unlink(missing_ok=True)
+
+    conn = sqlite3.connect(tmp_path)
+    try:
+        # Vendas em blocos; order_id UNIQUE + INSERT OR IGNORE mantém a primeira
+        # linha de cada pedido e as linhas sem order_id ficam de fora, como o
+        # unique_orders do load_data (o UNIQUE aceitaria todos os NULLs)
+        created = False
+        for chunk in pd.read_csv(mart_dir / "df.csv", chunksize=chunksize, index_col=0):
+            chunk = apply_schema(chunk[chunk["order_id"].notna()].copy())
+            if not created:
+                _create_table(conn, SALES_TABLE, chunk, constraints=", UNIQUE(order_id)")
+                created = True
+            _insert_frame(conn, SALES_TABLE, chunk, ignore_duplicates=True)
+        conn.execute(f"CREATE INDEX idx_sales_filters ON {SALES_TABLE} (genre_desc, price)")
+
+        for name, table in ((DATE_DIM_MART, DATE_DIM_TABLE), (EDITIONS_MART, EDITIONS_TABLE), (RATING_HIST_MART, RATING_HIST_TABLE)):
+            frame = pd.read_csv(mart_dir / name)
+            frame = apply_schema(frame.drop(columns=[col for col in frame.columns if col.startswith("Unnamed:")]))
+            _create_table(conn, table, frame)
+            _insert_frame(conn, table, frame)
+        _create_rating_facts_view(conn)
+        conn.execute(f"CREATE UNIQUE INDEX idx_date_dim ON {DATE_DIM_TABLE} (date_id)")
+        conn.commit()
+    finally:
+        conn.close()
+    os.replace(tmp_path, db_path)
+
+
+def _where(filters):
+    clauses, params = [], []
+    if filters is not None:
+        clauses.append(f"genre_desc IN ({', '.join('?' * len(filters.genres))})")
+        params.extend(filters.genres)
+        # Mesmo arredondamento do filtro em pandas (preço em centavos)
+        clauses.append("ROUND(price, 2) BETWEEN ? AND ?")
+        params.extend(float(p) for p in filters.price_range)
+        if filters.discount_only:
+            clauses.append("discount > 0")
+    return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+
+class SqliteBackend:
+    # Conexões somente leitura, uma por thread (o Streamlit atende sessões em threads)
+
+    def __init__(self, db_path):
+        self.db_path = Path(db_path)
+        self._local = threading.local()
+
+    @property
+    def version(self):
+        stat = os.stat(self.db_path)
+        return f"{stat.st_mtime_ns}-{stat.st_size}"
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None or getattr(self._local, "version", None) != self.version:
+            if conn is not None:
+                conn.close()
+            conn = sqlite3.connect(f"file:{self.db_path}?mode=ro", uri=True, check_same_thread=False)
+            self._local.conn, self._local.version = conn, self.version
+        return conn
+
+    def query(self, sql, params=()):
+        return self._apply_types(pd.read_sql_query(sql, self._conn(), params=params))
+
+    def _apply_types(self, frame):
+        for col in DATE_COLUMNS:
+            if col in frame.columns:
+                frame[col] = pd.to_datetime(frame[col], format="ISO8601")
+        for col in CATEGORY_COLUMNS:
+            if col in frame.columns:
+                frame[col] = frame[col].astype("category")
+        return frame
+
+    def filter_options(self, file_path):
+        table = MART_TABLES[Path(file_path).name]
+        genres = self.query(f"SELECT genre_desc FROM {table} GROUP BY genre_desc ORDER BY MIN(rowid)")
+        bounds = self.query(f"SELECT MIN(price) AS lo, MAX(price) AS hi FROM {table}")
+        return genres["genre_desc"].tolist(), float(bounds["lo"][0]), float(bounds["hi"][0])
+
+    def sales_cube(self, filters=None):
+        # Mesmo formato de cube.slice_cube: a agregação acontece dentro do banco
+        where, params = _where(filters)
+        cube = self.query(
+            "SELECT genre_desc, d.month AS month, ROUND(price, 2) AS price, COALESCE(discount, 0) > 0 AS discounted, "
+            "COUNT(*) AS count, SUM(price) AS revenue, SUM(total_discount) AS total_discount "
+            f"FROM {SALES_TABLE} JOIN {DATE_DIM_TABLE} d USING (date_id){where} GROUP BY 1, 2, 3, 4",
+            params,
+        )
+        cube["discounted"] = cube["discounted"].astype(bool)
+        return cube
+
+    def rating_facts(self, filters=None):
+        where, params = _where(filters)
+        return self.query(f"SELECT * FROM {RATING_FACTS_VIEW}{where}", params)
+
+    def columns(self, file_path):
+        table = MART_TABLES[Path(file_path).name]
+        return [row[1] for row in self._conn().execute(f"PRAGMA table_info({table})")]
+
+    def rows(self, file_path, filters=None, limit=1000, offset=0, columns=None, order_by=None, ascending=True):
+        # Página de linhas com projeção e ordenação feitas no banco; nomes de
+        # coluna são validados contra o esquema antes de entrar no SQL
+        table = MART_TABLES[Path(file_path).name]
+        known = self.columns(file_path)
+        unknown = [col for col in [*(columns or []), *([order_by] if order_by else [])] if col not in known]
+        if unknown:
+            raise ValueError(f"Colunas desconhecidas em {table}: {unknown}")
+
+        select = ", ".join(f'"{col}"' for col in columns) if columns else "*"
+        where, params = _where(filters)
+        order = f' ORDER BY "{order_by}" {"ASC" if ascending else "DESC"} NULLS LAST' if order_by else ""
+        return self.query(f"SELECT {select} FROM {table}{where}{order} LIMIT ? OFFSET ?", [*params, limit, offset])
+
+    def iter_rows(self, file_path, filters=None, columns=None, chunksize=50_000):
+        # Um único cursor lido em blocos (sem OFFSET), para exportações grandes
+        table = MART_TABLES[Path(file_path).name]
+        known = self.columns(file_path)
+        unknown = [col for col in (columns or []) if col not in known]
+        if unknown:
+            raise ValueError(f"Colunas desconhecidas em {table}: {unknown}")
+
+        select = ", ".join(f'"{col}"' for col in columns) if columns else "*"
+        where, params = _where(filters)
+        chunks = pd.read_sql_query(f"SELECT {select} FROM {table}{where}", self._conn(), params=params, chunksize=chunksize)
+        for frame in chunks:
+            yield self._apply_types(frame)
+
+    def frame(self, file_path, filters=None, columns=None):
+        # Resultado completo (todas as linhas filtradas), lido em blocos pelo mesmo cursor
+        frames = list(self.iter_rows(file_path, filters, columns))
+        if not frames:
+            return self.rows(file_path, filters, limit=0, columns=columns)
+        # Categorias de blocos diferentes não coincidem; refaz os tipos no resultado
+        return self._apply_types(pd.concat(frames, ignore_index=True))
+
+    def count(self, file_path, filters=None):
+        table = MART_TABLES[Path(file_path).name]
+        where, params = _where(filters)
+        return int(self._conn().execute(f"SELECT COUNT(*) FROM {table}{where}", params).fetchone()[0])
@@ -0,0 +1,237 @@
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+
+import pandas as pd
+
+
+# Cache colunar dos marts: um Parquet tipado por CSV, reconstruído apenas
+# quando o CSV de origem muda (mtime/tamanho e, se necessário, hash)
+CACHE_DIR_NAME = ".cache"
+DATE_COLUMNS = ["sale_date", "publication_date", "birthday", "date"]
+CATEGORY_COLUMNS = ["genre_desc", "format_desc"]
+# Valores em reais e descontos continuam em float64 no layout compacto: em
+# float32 a tabela e a exportação mostrariam 35.84000015258789 no lugar de 35.84
+CURRENCY_COLUMNS = ["price", "discount", "total_discount", "revenue"]
+
+
+def _cache_stem(csv_path):
+    # Nome do mart + hash do caminho de origem: com LIVRARIA_CACHE_DIR, marts de
+    # diretórios diferentes (snapshots, dados sintéticos) dividem o mesmo cache
+    csv_path = Path(csv_path)
+    source = hashlib.sha256(str(csv_path.resolve()).encode()).hexdigest()[:8]
+    return f"{csv_path.stem}-{source}"
+
+
+def _cache_paths(csv_path):
+    cache_dir = Path(os.environ.get("LIVRARIA_CACHE_DIR", Path(csv_path).parent / CACHE_DIR_NAME))
+    stem = _cache_stem(csv_path)
+    return cache_dir / f"{stem}.parquet", cache_dir / f"{stem}.meta.json"
+
+
+def file_hash(path, chunk_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _read_meta(meta_path):
+    try:
+        return json.loads(meta_path.read_text())
+    except (OSError, ValueError):
+        return None
+
+
+def _write_atomic(path, write):
+    # Escreve em arquivo temporário e troca no final, para que outros
+    # workers nunca leiam um arquivo pela metade
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    write(tmp_path)
+    os.replace(tmp_path, path)
+
+
+def apply_schema(data):
+    for col in DATE_COLUMNS:
+        if col in data.columns and not pd.api.types.is_datetime64_any_dtype(data[col]):
+            data[col] = pd.to_datetime(data[col], format="ISO8601")
+    for col in CATEGORY_COLUMNS:
+        if col in data.columns:
+            data[col] = data[col].astype("category")
+    return data
+
+
+def build_columnar(csv_path):
+    parquet_path, meta_path = _cache_paths(csv_path)
+    parquet_path.parent.mkdir(parents=True, exist_ok=True)
+
+    data = apply_schema(pd.read_csv(csv_path))
+    _write_atomic(parquet_path, lambda p: data.to_parquet(p, engine="pyarrow", index=False))
+
+    stat = os.stat(csv_path)
+    meta = {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size, "sha256": file_hash(csv_path)}
+    _write_atomic(meta_path, lambda p: p.write_text(json.dumps(meta)))
+    return data
+
+
+def is_fresh(csv_path):
+    parquet_path, meta_path = _cache_paths(csv_path)
+    meta = _read_meta(meta_path)
+    if meta is None or not parquet_path.exists():
+        return False
+
+    stat = os.stat(csv_path)
+    if meta["mtime_ns"] == stat.st_mtime_ns and meta["size"] == stat.st_size:
+        return True
+
+    # mtime mudou (ex.: checkout ou cópia), mas o conteúdo pode ser o mesmo
+    if meta["size"] == stat.st_size and meta["sha256"] == file_hash(csv_path):
+        meta["mtime_ns"] = stat.st_mtime_ns
+        _write_atomic(meta_path, lambda p: p.write_text(json.dumps(meta)))
+        return True
+    return False
+
+
+def mart_columns(csv_path):
+    if not is_fresh(csv_path):
+        build_columnar(csv_path)
+    parquet_path, _ = _cache_paths(csv_path)
+    import pyarrow.parquet as pq
+
+    return pq.read_schema(parquet_path).names
+
+
+def compact(data):
+    # Tipos compactos: strings repetidas como categoria, chaves únicas como
+    # string do Arrow, float32 para valores (menos moeda e descontos) e
+    # inteiros no menor tipo possível
+    data = data.drop(columns=[col for col in data.columns if col.startswith("Unnamed:")])
+    for col in data.columns:
+        series = data[col]
+        if series.dtype == object:
+            if series.nunique() <= len(series) // 2:
+                data[col] = series.astype("category")
+            else:
+                data[col] = series.astype("string[pyarrow]")
+        elif pd.api.types.is_float_dtype(series) and col not in CURRENCY_COLUMNS:
+            data[col] = series.astype("float32")
+        elif pd.api.types.is_integer_dtype(series):
+            data[col] = pd.to_numeric(series, downcast="integer")
+    return data
+
+
+def read_mart(csv_path, columns=None, compact_dtypes=False):
+    if not is_fresh(csv_path):
+        data = build_columnar(csv_path)
+        if columns is not None:
+            data = data[list(columns)]
+    else:
+        # Projeção empurrada para o Parquet: colunas fora da lista nem são lidas
+        parquet_path, _ = _cache_paths(csv_path)
+        data = pd.read_parquet(parquet_path, engine="pyarrow", columns=None if columns is None else list(columns))
+    return compact(data) if compact_dtypes else data
+
+
+def unique_orders(data):
+    # Um item por pedido, como o dashboard conta as vendas. Linhas sem order_id
+    # saem: o drop_duplicates juntaria todas numa só e o UNIQUE do SQLite
+    # manteria todas, então os dois backends discordariam
+    return data[data["order_id"].notna()].drop_duplicates(subset=["order_id"])
+
+
+def memory_report(csv_path, columns=None):
+    # Compara o layout atual (todas as colunas, tipos do pandas) com a projeção compacta
+    current = read_mart(csv_path)
+    projected = read_mart(csv_path, columns=columns, compact_dtypes=True)
+    current_bytes = current.memory_usage(deep=True, index=False)
+    projected_bytes = projected.memory_usage(deep=True, index=False)
+    report = pd.DataFrame({
+        "current_dtype": current.dtypes.astype(str),
+        "current_bytes": current_bytes,
+        "compact_dtype": projected.dtypes.astype(str).reindex(current.columns),
+        "compact_bytes": projected_bytes.reindex(current.columns),
+    }, index=current.columns)
+    report.loc["total"] = ["", current_bytes.sum(), "", projected_bytes.sum()]
+    report["compact_bytes"] = report["compact_bytes"].fillna(0).astype("int64")
+    return report.fillna({"compact_dtype": "(fora da projeção)"})
+
+
+def dataset_version(csv_path):
+    # Versão do dataset = hash do CSV de origem (garante o cache atualizado)
+    if not is_fresh(csv_path):
+        build_columnar(csv_path)
+    _, meta_path = _cache_paths(csv_path)
+    return _read_meta(meta_path)["sha256"][:16]
+
+
+# Marts compartilhados: o frame compacto é gravado uma vez como Arrow IPC
+# (sem compressão) e cada processo o mapeia em memória só para leitura.
+# As páginas ficam no page cache do SO e são as mesmas para todos os workers.
+def shared_path(csv_path, version):
+    parquet_path, _ = _cache_paths(csv_path)
+    return parquet_path.with_name(f"{_cache_stem(csv_path)}.{version}.arrow")
+
+
+def write_shared(csv_path, version, data):
+    import pyarrow as pa
+
+    path = shared_path(csv_path, version)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    table = pa.Table.from_pandas(data, preserve_index=False)
+    # Nulos em float viram NaN já no arquivo: coluna com nulos o to_pandas
+    # precisa copiar para preenchê-los, sem nulos ela é uma view do mapa
+    for i, field in enumerate(table.schema):
+        if pa.types.is_floating(field.type) and table.column(i).null_count:
+            table = table.set_column(i, field, table.column(i).fill_null(pa.scalar(float("nan"), field.type)))
+
+    def write(tmp_path):
+        with pa.OSFile(str(tmp_path), "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+
+    _write_atomic(path, write)
+    # Versões antigas saem do diretório; processos que ainda as mapeiam
+    # continuam lendo até recarregar (no Linux o arquivo só some depois do munmap)
+    for old_path in path.parent.glob(f"{_cache_stem(csv_path)}.*.arrow"):
+        if old_path != path:
+            old_path.unlink(missing_ok=True)
+
+
+def _shared_dtype(arrow_type):
+    # Strings continuam no buffer do Arrow em vez de virar objetos Python
+    import pyarrow as pa
+
+    if pa.types.is_string(arrow_type) or pa.types.is_large_string(arrow_type):
+        return pd.StringDtype("pyarrow")
+    return None
+
+
+def read_shared(csv_path, version, build, columns=None):
+    import pyarrow as pa
+
+    path = shared_path(csv_path, version)
+    if not path.exists():
+        write_shared(csv_path, version, build())
+
+    table = pa.ipc.open_file(pa.memory_map(str(path), "r")).read_all()
+    if columns is not None:
+        table = table.select(list(columns))
+    # split_blocks evita consolidar colunas numéricas em um bloco novo. Ficam no
+    # mapa, sem cópia: colunas numéricas e datas sem nulos (floats já gravados
+    # com NaN), os códigos das categorias e os buffers das strings (ArrowStringArray).
+    # Um inteiro ou data com nulos, ou uma string que o pandas precise converter,
+    # seria copiado por processo
+    return table.to_pandas(split_blocks=True, types_mapper=_shared_dtype)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Relatório de memória de um mart: layout atual vs. compacto")
+    parser.add_argument("csv_path")
+    parser.add_argument("--columns", help="Projeção de colunas separadas por vírgula")
+    args = parser.parse_args()
+    columns = args.columns.split(",") if args.columns else None
+    print(memory_report(args.csv_path, columns=columns).to_string())
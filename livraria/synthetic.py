@@ -0,0 +1,184 @@
+import argparse
+import logging
+import shutil
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from livraria.sales_reader import read_sales
+
+
+# Gerador de dados sintéticos no mesmo esquema de data/: as tabelas de
+# dimensão são copiadas e sales.csv/ratings.csv são gerados na escala pedida,
+# com as distribuições do extrato original (popularidade por ISBN/livro,
+# descontos, itens por pedido, estrelas) e a linha corrompida do desconto
+# decimal em vírgula. Os blocos são escritos em sequência, sem manter o
+# arquivo inteiro em memória.
+DIMENSION_FILES = [
+    "author", "award", "book", "edition", "format", "genders", "info", "publisher", "series",
+]
+DISTRIBUTIONS = ["empirical", "uniform", "zipf"]
+CHUNK_ROWS = 500_000
+
+# Chave de dia usada em item_id/order_id no extrato original (2/1/2193 -> 107020)
+DAY_KEY_ORIGIN = pd.Timestamp("2193-01-02")
+DAY_KEY_BASE = 107020
+
+logger = logging.getLogger(__name__)
+
+
+def _weights(values, counts, distribution):
+    # Probabilidade de cada valor (ISBN ou livro) conforme a distribuição pedida
+    counts = counts.reindex(values, fill_value=0).to_numpy(dtype="float64")
+    if distribution == "uniform":
+        weights = np.ones(len(values))
+    elif distribution == "zipf":
+        ranks = np.empty(len(values))
+        ranks[np.argsort(-counts, kind="stable")] = np.arange(1, len(values) + 1)
+        weights = 1.0 / ranks
+    else:
+        weights = counts + 1.0
+    return weights / weights.sum()
+
+
+class SourceProfile:
+    # Distribuições observadas no extrato original (data/)
+
+    def __init__(self, source_dir):
+        source_dir = Path(source_dir)
+        sales = pd.concat(list(read_sales(source_dir / "sales.csv")), ignore_index=True)
+        ratings = pd.read_csv(source_dir / "ratings.csv")
+        editions = pd.read_csv(source_dir / "edition.csv")
+        books = pd.read_csv(source_dir / "book.csv")
+
+        self.isbns = editions["isbn"].drop_duplicates().to_numpy()
+        self.isbn_counts = sales["isbn"].value_counts()
+        self.book_ids = books["book_id"].drop_duplicates().to_numpy()
+        self.book_counts = ratings["book_id"].value_counts()
+
+        self.discount_rate = float(sales["discount"].notna().mean())
+        discounts = sales["discount"].dropna().value_counts(normalize=True)
+        self.discount_values = discounts.index.to_numpy()
+        self.discount_probs = discounts.to_numpy()
+
+        items = sales.groupby("order_id").size()
+        self.items_per_order = items.value_counts(normalize=True).sort_index()
+
+        stars = ratings["rating"].value_counts(normalize=True).sort_index()
+        self.star_values = stars.index.to_numpy()
+        self.star_probs = stars.to_numpy()
+        self.reviewers = int(ratings["reviewer_id"].max())
+
+
+def sales_lines(rng, profile, isbn_probs, n_rows, first_row, total_rows, days, first_order, malformed_share=1.0):
+    # Dias atribuídos pela posição global da linha: o arquivo sai ordenado por data
+    row = np.arange(first_row, first_row + n_rows)
+    day = row * days // total_rows
+    # Textos calculados uma vez por dia/valor de desconto e indexados por linha
+    day_dates = DAY_KEY_ORIGIN + pd.to_timedelta(np.arange(days), unit="D")
+    date_text = np.array([f"{d.day}/{d.month}/{d.year}" for d in day_dates], dtype=object)
+    day_key = pd.Series(np.arange(DAY_KEY_BASE, DAY_KEY_BASE + days).astype(str)[day])
+    sale_date = pd.Series(date_text[day])
+
+    # Pedidos com 1..k itens: cada linha abre um pedido novo com a probabilidade
+    # de um pedido ter terminado no item anterior
+    mean_items = float((profile.items_per_order.index * profile.items_per_order).sum())
+    new_order = rng.random(n_rows) < 1.0 / mean_items
+    new_order[0] = True
+    order_number = first_order + np.cumsum(new_order) - 1
+
+    isbn = pd.Series(rng.choice(profile.isbns, size=n_rows, p=isbn_probs))
+    item_id = (
+        day_key + "-" + pd.Series(rng.integers(1, 100, n_rows)).astype(str)
+        + "-" + pd.Series(rng.integers(1000, 10000, n_rows)).astype(str)
+    )
+    order_id = day_key + "-" + pd.Series(order_number).astype(str)
+
+    discounted = rng.random(n_rows) < profile.discount_rate
+    discount_index = rng.choice(len(profile.discount_values), size=n_rows, p=profile.discount_probs)
+    dot_text = np.array([f"{d:g}" for d in profile.discount_values] + [""], dtype=object)
+    discount = pd.Series(dot_text[np.where(discounted, discount_index, -1)])
+    malformed = discounted & (rng.random(n_rows) < malformed_share)
+
+    lines = sale_date + "," + isbn + "," + discount + "," + item_id + "," + order_id
+    if malformed.any():
+        # Registro inteiro entre aspas no primeiro campo e desconto com vírgula decimal (0,15)
+        lines[malformed] = (
+            '"' + sale_date[malformed] + "," + isbn[malformed] + ',""'
+            + discount[malformed].str.replace(".", ",", regex=False)
+            + '"",' + item_id[malformed] + "," + order_id[malformed] + '",,,,'
+        )
+    return lines, int(order_number[-1]) + 1
+
+
+def generate_sales(path, profile, rows, days=364, distribution="empirical", malformed_share=1.0, seed=0):
+    rng = np.random.default_rng(seed)
+    isbn_probs = _weights(profile.isbns, profile.isbn_counts, distribution)
+    next_order = 1
+    with open(path, "w", newline="") as f:
+        f.write("sale_date,isbn,discount,item_id,order_id\n")
+        for first_row in range(0, rows, CHUNK_ROWS):
+            n_rows = min(CHUNK_ROWS, rows - first_row)
+            lines, next_order = sales_lines(
+                rng, profile, isbn_probs, n_rows, first_row, rows, days, next_order, malformed_share,
+            )
+            f.write("\n".join(lines) + "\n")
+    logger.info("sales.csv: %d linhas (%d pedidos)", rows, next_order - 1)
+
+
+def generate_ratings(path, profile, rows, distribution="empirical", seed=0):
+    rng = np.random.default_rng(seed + 1)
+    book_probs = _weights(profile.book_ids, profile.book_counts, distribution)
+    with open(path, "w", newline="") as f:
+        f.write("book_id,rating,reviewer_id,review_id\n")
+        for first_row in range(0, rows, CHUNK_ROWS):
+            n_rows = min(CHUNK_ROWS, rows - first_row)
+            pd.DataFrame({
+                "book_id": rng.choice(profile.book_ids, size=n_rows, p=book_probs),
+                "rating": rng.choice(profile.star_values, size=n_rows, p=profile.star_probs),
+                "reviewer_id": rng.integers(1, profile.reviewers + 1, n_rows),
+                "review_id": np.arange(first_row + 1, first_row + n_rows + 1),
+            }).to_csv(f, header=False, index=False)
+    logger.info("ratings.csv: %d linhas", rows)
+
+
+def generate(out_dir, sales=1_000_000, ratings=None, days=364, distribution="empirical",
+             malformed_share=1.0, seed=0, source_dir="data"):
+    if distribution not in DISTRIBUTIONS:
+        raise ValueError(f"Distribuição desconhecida: {distribution}")
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    for name in DIMENSION_FILES:
+        shutil.copyfile(Path(source_dir) / f"{name}.csv", out_dir / f"{name}.csv")
+
+    profile = SourceProfile(source_dir)
+    # Sem escala explícita, avaliações mantêm a proporção do extrato (~0,9 por venda)
+    if ratings is None:
+        ratings = int(sales * profile.book_counts.sum() / profile.isbn_counts.sum())
+    generate_sales(out_dir / "sales.csv", profile, sales, days, distribution, malformed_share, seed)
+    generate_ratings(out_dir / "ratings.csv", profile, ratings, distribution, seed)
+    return {"sales": sales, "ratings": ratings, "days": days, "distribution": distribution, "seed": seed}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Gera CSVs sintéticos no esquema de data/ em escala configurável")
+    parser.add_argument("--out-dir", required=True, help="Diretório onde os CSVs são gravados")
+    parser.add_argument("--sales", type=int, default=1_000_000, help="Linhas de sales.csv")
+    parser.add_argument("--ratings", type=int, help="Linhas de ratings.csv (padrão: proporcional às vendas)")
+    parser.add_argument("--days", type=int, default=364, help="Dias cobertos pelas vendas, a partir de 2/1/2193")
+    parser.add_argument("--distribution", choices=DISTRIBUTIONS, default="empirical",
+                        help="Popularidade de ISBNs/livros: a do extrato, uniforme ou Zipf")
+    parser.add_argument("--malformed-share", type=float, default=1.0,
+                        help="Fração das vendas com desconto gravadas com vírgula decimal (linha corrompida)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--source-dir", default="data", help="Extrato original usado como perfil e dimensões")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    generate(args.out_dir, args.sales, args.ratings, args.days, args.distribution,
+             args.malformed_share, args.seed, args.source_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+import os
+import shutil
+import time
+from pathlib import Path
+
+import pandas as pd
+import streamlit as st
+
+from livraria import metrics
+from livraria.data import (
+    BACKEND, VIEWER_PAGE_ROWS, cube_is_exact, data_columns, data_page, filter_options, filtered_chunks,
+    filtered_row_count, get_filter_cache, record_filter_usage,
+)
+from livraria.downloads import export_url, install_route, new_export_path
+from livraria.export import EXPORT_FORMATS, export_chunks
+from livraria.filters import DISCOUNT_OPTIONS, FilterState
+from livraria.fragments import fragment_stats, get_figure_cache
+
+
+# Componentes de interface compartilhados pelas páginas: sidebar de filtros,
+# tabela paginada, exportação, gráficos medidos e o painel de desempenho
+
+@st.fragment(run_every="2s")
+def refine_when_exact(file_path = 'df.csv', columns=None):
+    # Avisa que os valores são aproximados e reexecuta a página quando o cubo exato fica pronto
+    if cube_is_exact(file_path, columns):
+        st.rerun()
+    st.info("⏳ Valores aproximados (amostra estratificada por gênero, intervalos de 95%). "
+            "Os gráficos são atualizados sozinhos quando o cálculo exato terminar.")
+
+def sidebar_filters(file_path = 'df.csv', rating=False, columns=None):
+    # Filtros interativos
+    genres, min_price, max_price = filter_options(file_path = file_path, columns = columns)
+    selected_genre = st.sidebar.pills("Selecione o(s) gênero(s):",
+                                        genres,
+                                        selection_mode="multi",
+                                        default=genres,
+                                        help="Escolha os gêneros para análise")
+    if selected_genre == []:
+        selected_genre = genres  # Se nenhum gênero for selecionado, mostrar todos
+
+    selected_price_range = st.sidebar.slider(
+        "💵 Intervalo de preço:", 
+        min_price, max_price, 
+        (min_price, max_price),
+        help="Defina a faixa de preço para análise"
+    )
+    discount_option = DISCOUNT_OPTIONS[0]
+    if not rating:
+        discount_option = st.sidebar.radio(
+            "🏷️ Filtro de desconto:",
+            DISCOUNT_OPTIONS,
+            help="Escolha se deseja ver todos os produtos ou apenas os vendidos com desconto"
+        )
+
+    filters = FilterState(
+        genres=tuple(selected_genre),
+        price_range=tuple(selected_price_range),
+        discount_only=discount_option == DISCOUNT_OPTIONS[1],
+    )
+    # Estados pedidos, para o aquecimento priorizar os mais frequentes
+    record_filter_usage(filters, file_path = file_path, rating = rating)
+    return filters
+
+@st.fragment
+def data_viewer(filters, file_path = 'df.csv', columns=None, rating=False, key="dados"):
+    # Tabela paginada e preguiçosa: nada é buscado até a tabela ser carregada,
+    # e trocar página, ordenação ou colunas reexecuta só este fragmento
+    if not st.toggle("Carregar tabela", key=f"{key}_open"):
+        return
+
+    available = data_columns(file_path = file_path, columns = columns)
+    total_rows = filtered_row_count(filters, file_path = file_path, columns = columns, rating = rating)
+    total_pages = max(1, -(-total_rows // VIEWER_PAGE_ROWS))
+
+    col1, col2, col3, col4 = st.columns([3, 2, 1, 1])
+    with col1:
+        show_columns = st.multiselect("Colunas", available, default=available, key=f"{key}_columns")
+    with col2:
+        order_by = st.selectbox("Ordenar por", [None, *available], format_func=lambda c: "—" if c is None else c,
+                                key=f"{key}_order_by")
+    with col3:
+        ascending = st.radio("Ordem", ["↑", "↓"], horizontal=True, key=f"{key}_ascending") == "↑"
+    with col4:
+        # A chave inclui o total: um filtro novo volta para a primeira página
+        page = st.number_input("Página", min_value=1, max_value=total_pages, value=1, step=1,
+                               key=f"{key}_page_{total_rows}")
+
+    page_frame = data_page(
+        filters, file_path = file_path, columns = columns, rating = rating, page = page - 1,
+        show_columns = show_columns or available, order_by = order_by, ascending = ascending,
+    )
+    st.caption(f"Página {page:,} de {total_pages:,} · {total_rows:,} linhas filtradas")
+    st.dataframe(page_frame, use_container_width=True)
+
+@st.fragment
+def export_panel(filters, file_path = 'df.csv', columns=None, rating=False, key="dados"):
+    # Exportação dos dados filtrados: o arquivo é gerado em blocos num arquivo
+    # no servidor, só quando pedido, e a página não é reexecutada. O download
+    # sai em blocos pela rota de livraria.downloads, sem carregar o arquivo na memória
+    col1, col2 = st.columns([2, 1])
+    with col1:
+        export_format = st.radio("Formato de exportação", list(EXPORT_FORMATS), horizontal=True,
+                                 key=f"{key}_export_format")
+    with col2:
+        prepare = st.button("📥 Preparar exportação", key=f"{key}_export")
+
+    if prepare:
+        extension, _ = EXPORT_FORMATS[export_format]
+        path = new_export_path(f"{Path(file_path).stem}_filtrado.{extension}")
+        with st.spinner("Gerando arquivo..."):
+            try:
+                with open(path, "wb") as sink:
+                    export_chunks(filtered_chunks(filters, file_path = file_path, columns = columns, rating = rating),
+                                  export_format, sink)
+            except BaseException:
+                shutil.rmtree(path.parent, ignore_errors=True)
+                raise
+        size = f"{path.stat().st_size / 2**20:,.1f} MB"
+        if install_route():
+            st.link_button(f"⬇️ Baixar arquivo ({size})", export_url(path))
+        else:
+            # Sem servidor Tornado (ex.: AppTest): informa onde o arquivo ficou
+            st.info(f"Arquivo gerado no servidor ({size}): `{path}`")
+
+def plotly_chart(fig, name, approximate=False):
+    # st.plotly_chart medido, com o tamanho do JSON da figura enviado ao navegador
+    if approximate:
+        fig.update_layout(title_text=f"{fig.layout.title.text} (aproximado)")
+    if not metrics.ENABLED:
+        return st.plotly_chart(fig, use_container_width=True)
+    start = time.perf_counter()
+    element = st.plotly_chart(fig, use_container_width=True)
+    metrics.record_payload(f"plotly_chart:{name}", time.perf_counter() - start, len(fig.to_json()))
+    return element
+
+def perf_panel():
+    # Painel oculto de desempenho: aparece só com ?perf=1 na URL
+    if st.query_params.get("perf") != "1":
+        return
+    with st.sidebar.expander("⏱️ Desempenho", expanded=True):
+        if not metrics.ENABLED:
+            st.info("Instrumentação desligada: inicie com LIVRARIA_METRICS=1.")
+            return
+        registry = metrics.get_registry()
+        snapshot = registry.snapshot()
+        st.caption(f"Processo {os.getpid()} · RSS {metrics.rss_bytes() / 2**20:,.0f} MB")
+        if snapshot:
+            table = pd.DataFrame.from_dict(snapshot, orient="index")
+            st.dataframe(
+                table[["count", "p50_ms", "p95_ms", "max_ms", "rss_delta_mb", "payload_kb"]].round(2),
+                use_container_width=True,
+            )
+        caches = {"fragmentos": fragment_stats(), "figuras": get_figure_cache().stats()}
+        if BACKEND != "sqlite":
+            caches["filtros"] = get_filter_cache().stats()
+        st.dataframe(pd.DataFrame(caches).T[["hits", "misses"]], use_container_width=True)
+        if st.button("Gravar métricas agora", key="perf_write"):
+            st.caption(f"Gravado em `{registry.write()}`")
@@ -0,0 +1,96 @@
+import atexit
+import json
+import os
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+
+from livraria.filters import FilterState
+from livraria.storage import CACHE_DIR_NAME, _write_atomic
+
+
+# Registro dos estados de filtro pedidos pelas sessões (por mart), de onde o
+# aquecimento dos caches tira os mais frequentes. Cada processo conta em
+# memória e grava periodicamente o seu arquivo; a leitura soma todos, então o
+# histórico continua valendo depois de reinícios e entre workers.
+USAGE_INTERVAL = float(os.environ.get("LIVRARIA_USAGE_INTERVAL", 60))
+# Estados guardados por arquivo (os mais pedidos)
+USAGE_MAX_STATES = 1000
+# Arquivos sem atualização há mais dias que isso (processos encerrados há
+# tempo) saem da classificação e são apagados na leitura
+USAGE_MAX_AGE_DAYS = float(os.environ.get("LIVRARIA_USAGE_MAX_AGE_DAYS", 30))
+
+
+def usage_dir():
+    return Path(os.environ.get("LIVRARIA_USAGE_DIR", Path(CACHE_DIR_NAME) / "usage"))
+
+
+def usage_key(file_path, filters, rating=False):
+    # Mesma normalização do filter_key, com o nome do mart (sem o snapshot)
+    return (
+        Path(file_path).name,
+        bool(rating),
+        tuple(sorted(filters.genres)),
+        tuple(float(p) for p in filters.price_range),
+        bool(filters.discount_only),
+    )
+
+
+class FilterUsage:
+
+    def __init__(self, path=None, interval=USAGE_INTERVAL):
+        self.path = Path(path) if path is not None else usage_dir() / f"filters-{os.getpid()}.json"
+        self.interval = interval
+        self.counts = Counter()
+        self._lock = threading.Lock()
+        self._last_write = time.monotonic()
+        # Processos curtos (ou encerrados entre duas gravações) não perdem as contagens
+        atexit.register(self.flush)
+
+    def record(self, file_path, filters, rating=False):
+        with self._lock:
+            self.counts[usage_key(file_path, filters, rating)] += 1
+            due = time.monotonic() - self._last_write >= self.interval
+            if due:
+                self._last_write = time.monotonic()
+        if due:
+            self.write()
+
+    def write(self):
+        with self._lock:
+            entries = [
+                {"mart": mart, "rating": rating, "genres": list(genres), "price_range": list(price_range),
+                 "discount_only": discount_only, "count": count}
+                for (mart, rating, genres, price_range, discount_only), count
+                in self.counts.most_common(USAGE_MAX_STATES)
+            ]
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        _write_atomic(self.path, lambda p: p.write_text(json.dumps(entries)))
+        return self.path
+
+    def flush(self):
+        if self.counts:
+            self.write()
+
+
+def popular_states(mart, rating=False, limit=5, directory=None, max_age_days=USAGE_MAX_AGE_DAYS):
+    # Estados mais pedidos de um mart, somando os arquivos de todos os processos
+    counts = Counter()
+    oldest = time.time() - max_age_days * 86400
+    for path in Path(directory or usage_dir()).glob("filters-*.json"):
+        try:
+            if path.stat().st_mtime < oldest:
+                path.unlink(missing_ok=True)
+                continue
+            entries = json.loads(path.read_text())
+        except (OSError, ValueError):
+            continue
+        for entry in entries:
+            if entry["mart"] == mart and entry["rating"] == bool(rating):
+                state = (tuple(entry["genres"]), tuple(entry["price_range"]), entry["discount_only"])
+                counts[state] += entry["count"]
+    return [
+        FilterState(genres, price_range, discount_only)
+        for (genres, price_range, discount_only), _ in counts.most_common(limit)
+    ]
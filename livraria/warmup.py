@@ -0,0 +1,85 @@
+import argparse
+import logging
+import os
+import sys
+import time
+from pathlib import Path
+
+from livraria.filters import DISCOUNT_OPTIONS
+
+
+# Aquecimento dos caches em disco antes de o servidor atender alguém (depois
+# do ETL, no deploy): as páginas rodam sem navegador (AppTest) no estado
+# inicial da sidebar e nos estados mais pedidos do registro de uso, e os
+# gráficos montados ficam no cache de figuras (.cache/figures), junto com o
+# cache colunar e os marts compartilhados, para todos os processos do servidor.
+# Os caches em memória de cada processo são aquecidos por ele mesmo ao iniciar
+# (livraria.data.start_warmup).
+APP = "streamlit_app.py"
+PAGES = {"Geral.py": ("df.csv", False), "Avaliações.py": ("book_rating_hist.csv", True)}
+
+logger = logging.getLogger(__name__)
+
+
+def _apply(at, filters):
+    # Coloca o estado nos widgets da sidebar; False se a sidebar atual não o produz
+    pills = at.sidebar.button_group[0]
+    slider = at.sidebar.slider[0]
+    low, high = filters.price_range
+    if not set(filters.genres) <= {option.content for option in pills.options}:
+        return False
+    if not slider.min <= low <= high <= slider.max:
+        return False
+    pills.set_value(list(filters.genres))
+    slider.set_value((low, high))
+    if at.sidebar.radio:
+        at.sidebar.radio[0].set_value(DISCOUNT_OPTIONS[int(filters.discount_only)])
+    return True
+
+
+def warm_pages(app=APP, limit=5, timeout=120):
+    # O registro de uso não conta as execuções do próprio aquecimento, e o
+    # aquecimento em segundo plano não serve para um processo que termina
+    os.environ["LIVRARIA_WARMUP"] = "0"
+    from livraria.loadtest import ConcurrentAppTest, shared_runtime
+    from livraria.usage import popular_states
+
+    app = str(Path(app).resolve())
+    sys.path.insert(0, str(Path(app).parent))
+    runs = []
+    with shared_runtime():
+        for page, (mart, rating) in PAGES.items():
+            at = ConcurrentAppTest(app, default_timeout=timeout)
+            if page != next(iter(PAGES)):
+                at.run()
+                at.switch_page(page)
+            # None: estado inicial da sidebar
+            for filters in [None, *popular_states(mart, rating, limit)]:
+                if filters is not None and not _apply(at, filters):
+                    continue
+                start = time.perf_counter()
+                at.run()
+                runs.append({"page": page, "seconds": time.perf_counter() - start, "errors": len(at.exception)})
+    return runs
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Aquece os caches em disco do dashboard com os estados de filtro mais pedidos")
+    parser.add_argument("--app", default=APP)
+    parser.add_argument("--states", type=int, default=5, help="Estados mais pedidos por página, além do inicial")
+    parser.add_argument("--timeout", type=float, default=120, help="Tempo máximo de cada execução (s)")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    runs = warm_pages(args.app, args.states, args.timeout)
+    for page in PAGES:
+        page_runs = [run for run in runs if run["page"] == page]
+        logger.info("%s: %d estados em %.1fs", page, len(page_runs), sum(run["seconds"] for run in page_runs))
+    errors = sum(run["errors"] for run in runs)
+    if errors:
+        logger.error("%d execuções com erro", errors)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
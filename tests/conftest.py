@@ -0,0 +1,72 @@
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from livraria.etl import build_full
+from livraria.filters import FilterState
+from livraria.synthetic import generate
+from livraria.storage import read_mart, unique_orders
+
+
+# Dados sintéticos (livraria.synthetic) no esquema de data/, gerados e
+# transformados pelo ETL uma vez por execução dos testes
+DATA_DIR = Path(__file__).resolve().parent.parent / "data"
+SYNTHETIC_SALES = 20_000
+SEED = 17
+
+
+@pytest.fixture(scope="session")
+def source_dir():
+    return DATA_DIR
+
+
+@pytest.fixture(scope="session")
+def synthetic_dir(source_dir, tmp_path_factory):
+    data_dir = tmp_path_factory.mktemp("synthetic")
+    generate(data_dir, sales=SYNTHETIC_SALES, seed=SEED, source_dir=source_dir)
+    return data_dir
+
+
+@pytest.fixture(scope="session")
+def marts_dir(synthetic_dir, tmp_path_factory):
+    out_dir = tmp_path_factory.mktemp("marts")
+    build_full(synthetic_dir, out_dir, chunksize=5_000, processes=1)
+    return out_dir
+
+
+@pytest.fixture(scope="session")
+def sales(marts_dir):
+    # Mart de vendas como o dashboard o lê: tipos compactos, um item por pedido
+    return unique_orders(read_mart(marts_dir / "df.csv", compact_dtypes=True)).reset_index(drop=True)
+
+
+def random_states(sales, count, seed):
+    rng = np.random.default_rng(seed)
+    genres = sales["genre_desc"].cat.categories.tolist()
+    prices = sales["price"].to_numpy(dtype=float).round(2)
+    states = [
+        FilterState(tuple(genres), (float(prices.min()), float(prices.max()))),
+        FilterState((), (float(prices.min()), float(prices.max()))),
+    ]
+    for _ in range(count):
+        selected = rng.choice(genres, size=rng.integers(1, len(genres) + 1), replace=False)
+        low, high = np.sort(rng.choice(prices, size=2))
+        states.append(FilterState(tuple(selected), (float(low), float(high)), bool(rng.integers(2))))
+    return states
+
+
+def pandas_mask(sales, filters):
+    # Referência: os filtros da sidebar aplicados linha a linha com pandas
+    price = sales["price"].to_numpy(dtype=float).round(2)
+    mask = sales["genre_desc"].isin(filters.genres).to_numpy()
+    mask &= (price >= filters.price_range[0]) & (price <= filters.price_range[1])
+    if filters.discount_only:
+        mask &= (sales["discount"] > 0).to_numpy()
+    return mask
+
+
+@pytest.fixture(params=range(3))
+def filter_cases(sales, request):
+    # Estados aleatórios da sidebar com a máscara esperada de cada um
+    return [(filters, pandas_mask(sales, filters)) for filters in random_states(sales, 20, request.param)]
@@ -0,0 +1,17 @@
+import pandas as pd
+
+from livraria.cube import build_sales_cube, by_genre, slice_cube
+from livraria.dates import DATE_DIM_MART
+from livraria.storage import read_mart
+
+
+def test_cube_matches_pandas_mask(sales, marts_dir, filter_cases):
+    cube = build_sales_cube(sales, read_mart(marts_dir / DATE_DIM_MART, compact_dtypes=True))
+    for filters, mask in filter_cases:
+        rows = sales[mask]
+        expected = pd.DataFrame({
+            "count": rows.groupby("genre_desc", observed=True).size(),
+            "revenue": rows["price"].astype("float64").round(2).groupby(rows["genre_desc"], observed=True).sum(),
+        })
+        result = by_genre(slice_cube(cube, filters))[["count", "revenue"]]
+        pd.testing.assert_frame_equal(result, expected, check_dtype=False, check_index_type=False, check_names=False)
@@ -0,0 +1,16 @@
+import pandas as pd
+import pytest
+
+from livraria.dates import build_date_dimension, lookup
+
+
+def test_lookup_joins_attribute():
+    date_dim = build_date_dimension(2020, 2021)
+    result = lookup(date_dim, pd.Series([20200105, 20211231, 20200105]), "month")
+    assert list(result) == [1, 12, 1]
+
+
+def test_lookup_rejects_missing_date_ids():
+    date_dim = build_date_dimension(2020, 2020)
+    with pytest.raises(ValueError, match="20210101, 19991231"):
+        lookup(date_dim, pd.Series([20200105, 20210101, 19991231, 20210101]), "month")
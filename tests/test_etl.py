@@ -0,0 +1,47 @@
+import shutil
+
+import pandas as pd
+
+from livraria.books import BOOK_MONTHLY_MART, BOOK_SALES_MART
+from livraria.etl import build_full, build_incremental
+
+
+def split_sales(source, first, rest):
+    # Primeira metade de sales.csv até o fim de um pedido, bytes preservados (CRLF)
+    lines = source.read_bytes().splitlines(keepends=True)
+    cut = len(lines) // 2
+    order = lambda line: line.rstrip(b"\r\n").rsplit(b",", 1)[-1]
+    while cut < len(lines) - 1 and order(lines[cut]) == order(lines[cut - 1]):
+        cut += 1
+    first.write_bytes(b"".join(lines[:cut]))
+    rest.write_bytes(b"".join(lines[cut:]))
+
+
+def read_sorted(path, keys, dedupe=None, index_col=None):
+    data = pd.read_csv(path, index_col=index_col)
+    if dedupe:
+        data = data.drop_duplicates(subset=[dedupe])
+    return data.sort_values(keys).reset_index(drop=True)
+
+
+def test_incremental_matches_full_build(synthetic_dir, marts_dir, tmp_path):
+    data_dir = tmp_path / "data"
+    shutil.copytree(synthetic_dir, data_dir, ignore=shutil.ignore_patterns(".cache"))
+    rest = tmp_path / "rest.csv"
+    split_sales(synthetic_dir / "sales.csv", data_dir / "sales.csv", rest)
+
+    out_dir = tmp_path / "out"
+    out_dir.mkdir()
+    build_full(data_dir, out_dir, chunksize=5_000, processes=1)
+    with open(data_dir / "sales.csv", "ab") as f:
+        f.write(rest.read_bytes())
+    state = build_incremental(data_dir, out_dir, chunksize=5_000, processes=1)
+
+    # O mart de vendas tem o índice na primeira coluna; o dashboard usa um item por pedido
+    full = read_sorted(marts_dir / "df.csv", ["order_id"], dedupe="order_id", index_col=0)
+    incremental = read_sorted(out_dir / "df.csv", ["order_id"], dedupe="order_id", index_col=0)
+    pd.testing.assert_frame_equal(incremental, full)
+    assert state["sales_mart_rows"] == len(pd.read_csv(marts_dir / "df.csv", usecols=["order_id"]))
+
+    for name, keys in [(BOOK_SALES_MART, ["isbn"]), (BOOK_MONTHLY_MART, ["book_id", "month"])]:
+        pd.testing.assert_frame_equal(read_sorted(out_dir / name, keys), read_sorted(marts_dir / name, keys))
@@ -0,0 +1,35 @@
+import numpy as np
+import pytest
+
+from livraria.filter_cache import FilterCache, filter_key
+from livraria.filters import FilterState
+
+
+def test_filter_cache_lru_byte_bound():
+    rows = {name: np.arange(100, dtype=np.int64) for name in "abcd"}  # 800 bytes cada
+    cache = FilterCache(max_bytes=2_000)
+
+    def key(name):
+        return filter_key("df.csv", "v1", FilterState((name,), (0.0, 1.0)))
+
+    for name in "abc":
+        cache.get_or_compute(key(name), lambda name=name: rows[name])
+    # Três entradas passam do limite: a mais antiga (a) sai
+    assert cache.stats() == {"entries": 2, "bytes": 1_600, "hits": 0, "misses": 3, "evictions": 1}
+
+    # b volta a ser a mais recente, então d tira c
+    assert cache.get_or_compute(key("b"), lambda: pytest.fail("b deveria estar no cache")) is rows["b"]
+    cache.get_or_compute(key("d"), lambda: rows["d"])
+    assert cache.get_or_compute(key("b"), lambda: pytest.fail("b deveria estar no cache")) is rows["b"]
+    stats = cache.stats()
+    assert (stats["entries"], stats["bytes"], stats["evictions"]) == (2, 1_600, 2)
+    assert stats["bytes"] <= cache.max_bytes
+
+    # Entradas maiores que o limite inteiro não são guardadas
+    cache.get_or_compute(key("e"), lambda: np.arange(1_000, dtype=np.int64))
+    assert cache.stats()["entries"] == 2
+    # Uma versão nova do dataset descarta as entradas da anterior
+    cache.get_or_compute(filter_key("df.csv", "v2", FilterState(("a",), (0.0, 1.0))), lambda: rows["a"])
+    assert cache.stats()["entries"] == 1
+    # Resultados guardados são somente leitura
+    assert not rows["a"].flags.writeable
@@ -0,0 +1,9 @@
+import numpy as np
+
+from livraria.filter_index import FilterIndex
+
+
+def test_filter_index_matches_pandas_mask(sales, filter_cases):
+    index = FilterIndex(sales)
+    for filters, mask in filter_cases:
+        np.testing.assert_array_equal(index.positions(filters), np.flatnonzero(mask))
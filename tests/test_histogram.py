@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+
+from livraria.histogram import bin_edges, histogram_frame
+
+
+def dense_counts(frame, edges, group=0):
+    counts = np.zeros(len(edges) - 1)
+    selected = frame[frame["group"] == group]
+    counts[np.searchsorted(edges, selected["bin_start"].to_numpy())] = selected["count"]
+    return counts
+
+
+@pytest.mark.parametrize("nbins", [5, 10, 20])
+def test_histogram_frame_matches_numpy(sales, nbins):
+    values = sales["price"].to_numpy(dtype=float)
+    edges = bin_edges(values, nbins)
+    expected, _ = np.histogram(values, bins=edges)
+    frame = histogram_frame(values, nbins=nbins)
+    np.testing.assert_array_equal(dense_counts(frame, edges), expected)
+    assert frame["count"].sum() == len(values)
+
+
+def test_histogram_frame_weights_and_groups():
+    rng = np.random.default_rng(0)
+    values = rng.gamma(2.0, 8.0, 5_000).round(2)
+    weights = rng.integers(1, 6, len(values))
+    groups = rng.choice(["a", "b", "c"], len(values))
+    edges = bin_edges(values)
+    frame = histogram_frame(values, weights=weights, groups=groups)
+    for group in "abc":
+        selected = groups == group
+        expected, _ = np.histogram(values[selected], bins=edges, weights=weights[selected])
+        np.testing.assert_array_equal(dense_counts(frame, edges, group), expected)
+
+
+def test_histogram_frame_empty():
+    assert histogram_frame(np.array([])).empty
+
+
+def test_histogram_frame_rounds_fractional_weights():
+    values = np.array([1.0, 1.0, 1.0, 9.0, 9.0])
+    weights = np.array([0.1, 0.7, 0.2, 1.6, 1.7])
+    frame = histogram_frame(values, weights=weights, nbins=2)
+    assert frame["count"].tolist() == [1, 3]
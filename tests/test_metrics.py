@@ -0,0 +1,17 @@
+import time
+
+from livraria.metrics import Registry
+
+
+def test_registry_writes_periodically_and_removes_file(tmp_path):
+    path = tmp_path / "livraria.prom"
+    registry = Registry(path=path, interval=0.05).start()
+    registry.record("etapa", 0.25)
+    deadline = time.monotonic() + 5
+    while not path.exists() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert 'livraria_duration_seconds_count{name="etapa"' in path.read_text()
+
+    registry.close()
+    assert not path.exists()
+    assert not registry._thread.is_alive()
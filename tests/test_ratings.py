@@ -0,0 +1,37 @@
+import pandas as pd
+import pytest
+
+from livraria.ratings import EDITIONS_MART, RATING_HIST_MART, by_genre, by_rating, read_rating_facts, totals
+from livraria.storage import compact, read_mart
+
+
+@pytest.fixture(scope="module")
+def facts(marts_dir):
+    return compact(read_rating_facts(marts_dir / RATING_HIST_MART))
+
+
+@pytest.fixture(scope="module")
+def exploded(marts_dir, synthetic_dir):
+    # Tabela explodida de antes do esquema estrela: uma linha por avaliação × edição
+    ratings = pd.read_csv(synthetic_dir / "ratings.csv", usecols=["book_id", "rating"])
+    exploded = pd.merge(read_mart(marts_dir / EDITIONS_MART), ratings, how="inner", on="book_id")
+    exploded["price"] = exploded["price"].round(2)
+    return exploded
+
+
+def test_totals_match_exploded(facts, exploded):
+    result = totals(facts)
+    assert result["reviews"] == len(exploded)
+    assert result["avg_rating"] == pytest.approx(exploded["rating"].mean())
+    assert result["avg_price"] == pytest.approx(exploded["price"].mean())
+    assert result["satisfaction"] == pytest.approx((exploded["rating"] >= 4).mean())
+
+
+@pytest.mark.parametrize("aggregate, key", [(by_genre, "genre_desc"), (by_rating, "rating")])
+def test_weighted_aggregates_match_exploded(facts, exploded, aggregate, key):
+    result = aggregate(facts)
+    expected = exploded.groupby(key, observed=True).agg(n=("rating", "size"), avg_rating=("rating", "mean"),
+                                         avg_price=("price", "mean"))
+    result.index = result.index.astype(expected.index.dtype)
+    pd.testing.assert_frame_equal(result[["n", "avg_rating", "avg_price"]], expected,
+                                  check_dtype=False, check_names=False)
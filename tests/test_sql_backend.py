@@ -0,0 +1,33 @@
+import shutil
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from livraria.sql_backend import SqliteBackend, build_database
+from livraria.storage import read_mart, unique_orders
+
+
+@pytest.fixture(scope="module")
+def backend(marts_dir, tmp_path_factory):
+    db_path = tmp_path_factory.mktemp("sqlite") / "livraria.sqlite"
+    build_database(marts_dir, db_path, chunksize=5_000)
+    return SqliteBackend(db_path)
+
+
+def test_sqlite_count_matches_pandas_mask(backend, filter_cases):
+    for filters, mask in filter_cases:
+        assert backend.count("df.csv", filters) == mask.sum()
+
+
+def test_sqlite_and_pandas_drop_rows_without_order(marts_dir, tmp_path):
+    mart_dir = tmp_path / "marts"
+    shutil.copytree(marts_dir, mart_dir, ignore=shutil.ignore_patterns(".cache", "*.sqlite"))
+    sales = pd.read_csv(mart_dir / "df.csv", index_col=0)
+    sales.loc[sales.index[np.arange(0, len(sales), 50)], "order_id"] = np.nan
+    sales.to_csv(mart_dir / "df.csv")
+
+    build_database(mart_dir, mart_dir / "livraria.sqlite", chunksize=5_000)
+    expected = unique_orders(read_mart(mart_dir / "df.csv"))
+    assert SqliteBackend(mart_dir / "livraria.sqlite").count("df.csv") == len(expected)
+    assert expected["order_id"].notna().all()
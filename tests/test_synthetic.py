@@ -0,0 +1,36 @@
+import pandas as pd
+import pytest
+
+from livraria.sales_reader import read_sales
+from livraria.synthetic import SourceProfile, generate_sales
+
+
+def read_all(path):
+    reader = read_sales(path, chunksize=3_000)
+    sales = pd.concat(list(reader), ignore_index=True)
+    return sales, reader
+
+
+def test_generated_sales_read_back_as_valid_rows(synthetic_dir):
+    sales, reader = read_all(synthetic_dir / "sales.csv")
+    with open(synthetic_dir / "sales.csv") as f:
+        assert len(sales) == reader.rows == sum(1 for _ in f) - 1
+    assert reader.invalid_rows == 0
+    # Com malformed_share=1.0 todo desconto sai com vírgula decimal e é corrigido na leitura
+    assert reader.repaired_rows == sales["discount"].notna().sum() > 0
+    assert sales["discount"].dropna().between(0, 1).all()
+    assert sales["sale_date"].is_monotonic_increasing
+
+
+@pytest.mark.parametrize("malformed_share", [0.0, 0.5])
+def test_malformed_lines_match_clean_lines(source_dir, tmp_path, malformed_share):
+    # Mesma semente: só a formatação do desconto muda entre os dois arquivos
+    profile = SourceProfile(source_dir)
+    generate_sales(tmp_path / "clean.csv", profile, 2_000, malformed_share=0.0, seed=3)
+    generate_sales(tmp_path / "mixed.csv", profile, 2_000, malformed_share=malformed_share, seed=3)
+    clean, clean_reader = read_all(tmp_path / "clean.csv")
+    mixed, mixed_reader = read_all(tmp_path / "mixed.csv")
+    pd.testing.assert_frame_equal(mixed, clean)
+    assert clean_reader.repaired_rows == 0
+    assert mixed_reader.invalid_rows == 0
+    assert (mixed_reader.repaired_rows > 0) == (malformed_share > 0)